@@ -1,14 +1,22 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import os
 import json
 import datetime
+import time
 import asyncio
 import random
 import sys
 import aiohttp
 import gc
+import heapq
+import bisect
 import threading
+import unicodedata
+import weakref
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+from sortedcontainers import SortedList
 from aiohttp import web
 import asyncpg
 
@@ -21,7 +29,16 @@ intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+class Bot(commands.Bot):
+    async def close(self):
+        """Flush pending saves before disconnecting"""
+        await flush_all_saves()
+        await db.close()
+        await super().close()
+
+COMMAND_PREFIX = '!'
+
+bot = Bot(command_prefix=COMMAND_PREFIX, intents=intents)
 
 print("✅ Bot initialized")
 
@@ -32,11 +49,16 @@ SHOP_FILE = "shop_items.json"
 ROLE_SALARIES_FILE = "role_salaries.json"
 COUNTRIES_FILE = "countries.json"
 COUNTRY_SCORES_FILE = "country_scores.json"
+COUNTRY_SEASONS_FILE = "country_seasons.json"
 QUARANTINE_FILE = "quarantine_data.json"
 BUSINESS_FILE = "business_data.json"
 LAST_SALARY_FILE = "last_salary.json"
 LAST_BUSINESS_PROFIT_FILE = "last_business_profit.json"
 SIMPLE_BUSINESS_FILE = "simple_businesses.json"      # NEW
+ECONOMY_JOURNAL_FILE = "economy_journal.jsonl"
+JOURNAL_COMPACT_EVERY = 1000   # journal entries between economy snapshots
+PAYROLL_LEDGER_FILE = "payroll_ledger.jsonl"
+JOBS_FILE = "scheduled_jobs.json"
 # ===== HELPER FUNCTIONS =====
 def format_money(amount):
     """Format money with commas"""
@@ -91,8 +113,8 @@ class Database:
             await conn.execute('''
                 CREATE TABLE IF NOT EXISTS economy (
                     user_id BIGINT PRIMARY KEY,
-                    wallet INTEGER DEFAULT 0,
-                    bank INTEGER DEFAULT 0,
+                    wallet BIGINT DEFAULT 0,
+                    bank BIGINT DEFAULT 0,
                     last_daily TIMESTAMP,
                     last_work TIMESTAMP,
                     owned_items JSONB DEFAULT '{}',
@@ -127,6 +149,23 @@ class Database:
                     score INTEGER DEFAULT 0
                 )
             ''')
+            # Current country game season per guild, and every season's scores
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS country_seasons (
+                    guild_id BIGINT PRIMARY KEY,
+                    season INTEGER NOT NULL,
+                    started_at TIMESTAMP
+                )
+            ''')
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS country_season_scores (
+                    guild_id BIGINT,
+                    season INTEGER,
+                    user_id BIGINT,
+                    score INTEGER DEFAULT 0,
+                    PRIMARY KEY (guild_id, season, user_id)
+                )
+            ''')
             # Shop items table
             await conn.execute('''
                 CREATE TABLE IF NOT EXISTS shop_items (
@@ -138,6 +177,23 @@ class Database:
                     PRIMARY KEY (category, item_name)
                 )
             ''')
+            # Scheduled job state (next/last run of periodic jobs)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                    name TEXT PRIMARY KEY,
+                    next_run TIMESTAMP,
+                    last_run TIMESTAMP,
+                    last_result TEXT
+                )
+            ''')
+            # Payroll ledger (who has been paid for the latest run date)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS payroll_ledger (
+                    run_date DATE,
+                    user_id BIGINT,
+                    PRIMARY KEY (run_date, user_id)
+                )
+            ''')
             # Role salaries table
             await conn.execute('''
                 CREATE TABLE IF NOT EXISTS role_salaries (
@@ -145,56 +201,257 @@ class Database:
                     salary INTEGER
                 )
             ''')
+            # Inventory table (one row per owned item)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS inventory (
+                    user_id BIGINT,
+                    category TEXT,
+                    item TEXT,
+                    qty INTEGER DEFAULT 1,
+                    PRIMARY KEY (user_id, category, item)
+                )
+            ''')
+            # Businesses table (one business per user)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS businesses (
+                    user_id BIGINT PRIMARY KEY,
+                    name TEXT,
+                    type TEXT,
+                    investment BIGINT,
+                    profit_rate DOUBLE PRECISION,
+                    created_at TIMESTAMP,
+                    last_profit TIMESTAMP,
+                    total_profit BIGINT DEFAULT 0,
+                    level INTEGER DEFAULT 1,
+                    emoji TEXT
+                )
+            ''')
+            # Small key/value state, e.g. the last economy journal entry the database holds
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS bot_state (
+                    key TEXT PRIMARY KEY,
+                    value BIGINT
+                )
+            ''')
+            # Balances outgrow int32 (salaries go up to 50,000,000 a day); one overflowing
+            # row would otherwise fail every batched economy save
+            await conn.execute('''
+                ALTER TABLE economy
+                    ALTER COLUMN wallet TYPE BIGINT,
+                    ALTER COLUMN bank TYPE BIGINT
+            ''')
+            # !rich and its rank lookup read the economy ordered by total wealth
+            await conn.execute('''
+                CREATE INDEX IF NOT EXISTS economy_wealth_idx ON economy ((wallet + bank))
+            ''')
+            # Profits accrue from last_settled_at; settled but uncollected profit is pending_profit
+            await conn.execute('''
+                ALTER TABLE businesses
+                    ADD COLUMN IF NOT EXISTS last_settled_at TIMESTAMP,
+                    ADD COLUMN IF NOT EXISTS pending_profit BIGINT DEFAULT 0
+            ''')
+            await self.migrate_economy_blobs(conn)
             print("✅ Database tables verified/created.")
 
+    async def migrate_economy_blobs(self, conn):
+        """Move legacy economy.owned_items/businesses JSONB blobs into their own tables."""
+        async with conn.transaction():
+            await conn.execute('''
+                INSERT INTO inventory (user_id, category, item, qty)
+                SELECT e.user_id, c.key, i.item, COUNT(*)
+                FROM economy e,
+                     jsonb_each(e.owned_items) c,
+                     jsonb_array_elements_text(c.value) i(item)
+                GROUP BY e.user_id, c.key, i.item
+                ON CONFLICT (user_id, category, item) DO NOTHING
+            ''')
+            await conn.execute('''
+                INSERT INTO businesses (user_id, name, type, investment, profit_rate,
+                                        created_at, last_profit, total_profit, level, emoji)
+                SELECT user_id, businesses->>'name', businesses->>'type',
+                       (businesses->>'investment')::bigint, (businesses->>'profit_rate')::float8,
+                       (businesses->>'created_at')::timestamp, (businesses->>'last_profit')::timestamp,
+                       COALESCE((businesses->>'total_profit')::bigint, 0),
+                       COALESCE((businesses->>'level')::int, 1), businesses->>'emoji'
+                FROM economy
+                WHERE businesses ? 'name'
+                ON CONFLICT (user_id) DO NOTHING
+            ''')
+            await conn.execute('''
+                UPDATE economy SET owned_items = '{}', businesses = '{}'
+                WHERE owned_items <> '{}' OR businesses <> '{}'
+            ''')
+
     # --- Economy methods ---
-    async def load_economy(self):
-        """Load all economy data into dictionaries."""
-        wallets = {}
-        banks = {}
-        last_daily = {}
-        last_work = {}
-        owned_items = {}
-        businesses = {}
+    async def has_economy(self):
+        """Return True if the economy table has any rows."""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval('SELECT EXISTS (SELECT 1 FROM economy)')
+
+    async def load_accounts(self, user_ids):
+        """Load the economy records of `user_ids` as {user_id: UserAccount}."""
+        ids = list(user_ids)
+        accounts = {}
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch('SELECT * FROM economy')
+            rows = await conn.fetch('''
+                SELECT user_id, wallet, bank, last_daily, last_work
+                FROM economy WHERE user_id = ANY($1::bigint[])
+            ''', ids)
+            for row in rows:
+                accounts[row['user_id']] = UserAccount(
+                    row['user_id'], row['wallet'], row['bank'],
+                    row['last_daily'].timestamp() if row['last_daily'] else None,
+                    row['last_work'].timestamp() if row['last_work'] else None
+                )
+            rows = await conn.fetch('''
+                SELECT user_id, category, item, qty
+                FROM inventory WHERE user_id = ANY($1::bigint[])
+            ''', ids)
+            for row in rows:
+                uid = row['user_id']
+                account = accounts.setdefault(uid, UserAccount(uid))
+                account.owned_items.setdefault(row['category'], []).extend([row['item']] * row['qty'])
+            rows = await conn.fetch('SELECT * FROM businesses WHERE user_id = ANY($1::bigint[])', ids)
             for row in rows:
-                uid = str(row['user_id'])
-                wallets[uid] = row['wallet']
-                banks[uid] = row['bank']
-                if row['last_daily']:
-                    last_daily[uid] = row['last_daily'].isoformat()
-                if row['last_work']:
-                    last_work[uid] = row['last_work'].isoformat()
-                owned_items[uid] = json.loads(row['owned_items']) if row['owned_items'] else {}
-                businesses[uid] = json.loads(row['businesses']) if row['businesses'] else {}
-        return wallets, banks, last_daily, last_work, owned_items, businesses
-
-    async def save_economy(self, wallets, banks, last_daily, last_work, owned_items, businesses):
-        """Upsert economy data into database."""
+                uid = row['user_id']
+                account = accounts.setdefault(uid, UserAccount(uid))
+                account.business = {
+                    "name": row['name'],
+                    "type": row['type'],
+                    "investment": row['investment'],
+                    "profit_rate": row['profit_rate'],
+                    "created_at": row['created_at'].isoformat() if row['created_at'] else None,
+                    "last_profit": row['last_profit'].isoformat() if row['last_profit'] else None,
+                    "total_profit": row['total_profit'],
+                    "level": row['level'],
+                    "emoji": row['emoji'],
+                    "last_settled_at": row['last_settled_at'].isoformat() if row['last_settled_at'] else None,
+                    "pending_profit": row['pending_profit'] or 0
+                }
+        return accounts
+
+    async def load_richest(self, limit):
+        """Return the `limit` richest users as [(user_id, wallet + bank)]."""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT user_id, wallet + bank AS total FROM economy
+                WHERE wallet + bank > 0
+                ORDER BY wallet + bank DESC, user_id
+                LIMIT $1
+            ''', limit)
+            return [(row['user_id'], row['total']) for row in rows]
+
+    async def load_wealth_rank(self, user_id):
+        """Return (rank, wallet + bank) of `user_id`, or None if they have no money."""
+        async with self.pool.acquire() as conn:
+            total = await conn.fetchval('SELECT wallet + bank FROM economy WHERE user_id = $1', user_id)
+            if not total or total <= 0:
+                return None
+            richer = await conn.fetchval('SELECT COUNT(*) FROM economy WHERE wallet + bank > $1', total)
+            return richer + 1, total
+
+    async def load_journal_seq(self):
+        """Return the last economy journal seq committed with the accounts, or None."""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("SELECT value FROM bot_state WHERE key = 'economy_journal_seq'")
+
+    async def save_accounts(self, accounts, balances, items, businesses, journal_seq):
+        """
+        Write the changed balances, inventory rows and businesses of `accounts`
+        together with the journal seq they include, in one transaction, so a
+        crash can never leave the database ahead of its recorded seq.
+        """
         if not self.connected:
             return
         async with self.pool.acquire() as conn:
-            for uid, wallet in wallets.items():
-                bank = banks.get(uid, 0)
-                ld = last_daily.get(uid)
-                lw = last_work.get(uid)
-                oi = json.dumps(owned_items.get(uid, {}))
-                biz = json.dumps(businesses.get(uid, {}))
+            async with conn.transaction():
+                if balances:
+                    await self._save_balances(conn, [accounts[uid] for uid in balances])
+                if items:
+                    await self._save_inventory(conn, accounts, items)
+                if businesses:
+                    await self._save_businesses(conn, accounts, businesses)
                 await conn.execute('''
-                    INSERT INTO economy (user_id, wallet, bank, last_daily, last_work, owned_items, businesses)
-                    VALUES ($1, $2, $3, $4, $5, $6::jsonb, $7::jsonb)
-                    ON CONFLICT (user_id) DO UPDATE SET
-                        wallet = EXCLUDED.wallet,
-                        bank = EXCLUDED.bank,
-                        last_daily = EXCLUDED.last_daily,
-                        last_work = EXCLUDED.last_work,
-                        owned_items = EXCLUDED.owned_items,
-                        businesses = EXCLUDED.businesses
-                ''', int(uid), wallet, bank,
-                    datetime.datetime.fromisoformat(ld) if ld else None,
-                    datetime.datetime.fromisoformat(lw) if lw else None,
-                    oi, biz)
+                    INSERT INTO bot_state (key, value) VALUES ('economy_journal_seq', $1)
+                    ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+                ''', journal_seq)
+
+    async def _save_balances(self, conn, accounts):
+        """Upsert the balances and cooldowns of `accounts`."""
+        rows = [
+            (account.user_id, account.wallet, account.bank,
+             epoch_to_datetime(account.last_daily), epoch_to_datetime(account.last_work))
+            for account in accounts
+        ]
+        await conn.executemany('''
+            INSERT INTO economy (user_id, wallet, bank, last_daily, last_work)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (user_id) DO UPDATE SET
+                wallet = EXCLUDED.wallet,
+                bank = EXCLUDED.bank,
+                last_daily = EXCLUDED.last_daily,
+                last_work = EXCLUDED.last_work
+        ''', rows)
+
+    async def _save_inventory(self, conn, accounts, keys):
+        """Write the quantity of each (user_id, category, item) in `keys`."""
+        upserts = []
+        deletes = []
+        for uid, category, item in keys:
+            qty = accounts[uid].owned_items.get(category, []).count(item)
+            if qty:
+                upserts.append((uid, category, item, qty))
+            else:
+                deletes.append((uid, category, item))
+        if upserts:
+            await conn.executemany('''
+                INSERT INTO inventory (user_id, category, item, qty)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (user_id, category, item) DO UPDATE SET qty = EXCLUDED.qty
+            ''', upserts)
+        if deletes:
+            await conn.executemany('''
+                DELETE FROM inventory WHERE user_id = $1 AND category = $2 AND item = $3
+            ''', deletes)
+
+    async def _save_businesses(self, conn, accounts, user_ids):
+        """Upsert the businesses of `user_ids`, deleting the ones that were closed."""
+        upserts = []
+        deletes = []
+        for uid in user_ids:
+            biz = accounts[uid].business
+            if not biz:
+                deletes.append((uid,))
+                continue
+            upserts.append((
+                uid, biz["name"], biz["type"], biz["investment"], biz["profit_rate"],
+                datetime.datetime.fromisoformat(biz["created_at"]) if biz.get("created_at") else None,
+                datetime.datetime.fromisoformat(biz["last_profit"]) if biz.get("last_profit") else None,
+                biz.get("total_profit", 0), biz.get("level", 1), biz.get("emoji"),
+                datetime.datetime.fromisoformat(biz["last_settled_at"]) if biz.get("last_settled_at") else None,
+                biz.get("pending_profit", 0)
+            ))
+        if upserts:
+            await conn.executemany('''
+                INSERT INTO businesses (user_id, name, type, investment, profit_rate,
+                                        created_at, last_profit, total_profit, level, emoji,
+                                        last_settled_at, pending_profit)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    type = EXCLUDED.type,
+                    investment = EXCLUDED.investment,
+                    profit_rate = EXCLUDED.profit_rate,
+                    created_at = EXCLUDED.created_at,
+                    last_profit = EXCLUDED.last_profit,
+                    total_profit = EXCLUDED.total_profit,
+                    level = EXCLUDED.level,
+                    emoji = EXCLUDED.emoji,
+                    last_settled_at = EXCLUDED.last_settled_at,
+                    pending_profit = EXCLUDED.pending_profit
+            ''', upserts)
+        if deletes:
+            await conn.executemany('DELETE FROM businesses WHERE user_id = $1', deletes)
 
     # --- Warnings methods ---
     async def load_warnings(self):
@@ -214,14 +471,20 @@ class Database:
         """Save warnings to database."""
         if not self.connected:
             return
+        rows = [
+            (int(user), int(guild), count)
+            for guild, users in warnings_dict.items()
+            for user, count in users.items()
+        ]
+        if not rows:
+            return
         async with self.pool.acquire() as conn:
-            for guild, users in warnings_dict.items():
-                for user, count in users.items():
-                    await conn.execute('''
-                        INSERT INTO warnings (user_id, guild_id, count)
-                        VALUES ($1, $2, $3)
-                        ON CONFLICT (user_id, guild_id) DO UPDATE SET count = EXCLUDED.count
-                    ''', int(user), int(guild), count)
+            async with conn.transaction():
+                await conn.executemany('''
+                    INSERT INTO warnings (user_id, guild_id, count)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (user_id, guild_id) DO UPDATE SET count = EXCLUDED.count
+                ''', rows)
 
     # --- Quarantine methods ---
     async def load_quarantine(self):
@@ -250,15 +513,19 @@ class Database:
         """Save quarantine data."""
         if not self.connected:
             return
+        rows = [
+            (int(guild), int(user), info['channel_id'], info['reason'],
+             int(info['quarantined_by']), datetime.datetime.fromisoformat(info['quarantined_at']))
+            for guild, users in quarantined_dict.items()
+            for user, info in users.items()
+        ]
         async with self.pool.acquire() as conn:
-            await conn.execute('DELETE FROM quarantine')
-            for guild, users in quarantined_dict.items():
-                for user, info in users.items():
-                    await conn.execute('''
-                        INSERT INTO quarantine (guild_id, user_id, channel_id, reason, quarantined_by, quarantined_at)
-                        VALUES ($1, $2, $3, $4, $5, $6)
-                    ''', int(guild), int(user), info['channel_id'], info['reason'],
-                        int(info['quarantined_by']), datetime.datetime.fromisoformat(info['quarantined_at']))
+            async with conn.transaction():
+                await conn.execute('DELETE FROM quarantine')
+                await conn.copy_records_to_table(
+                    'quarantine', records=rows,
+                    columns=['guild_id', 'user_id', 'channel_id', 'reason', 'quarantined_by', 'quarantined_at']
+                )
 
     # --- Country scores methods ---
     async def load_country_scores(self):
@@ -270,17 +537,71 @@ class Database:
                 scores[str(row['user_id'])] = row['score']
         return scores
 
-    async def save_country_scores(self, scores_dict):
-        """Save country scores."""
+    async def add_country_scores(self, deltas, season_deltas):
+        """Add all-time {user_id: delta} and {(guild_id, season, user_id): delta} score deltas."""
         if not self.connected:
             return
+        rows = [(int(uid), delta) for uid, delta in deltas.items() if delta]
+        season_rows = [
+            (int(guild_id), season, int(uid), delta)
+            for (guild_id, season, uid), delta in season_deltas.items() if delta
+        ]
+        if not rows and not season_rows:
+            return
         async with self.pool.acquire() as conn:
-            for uid, score in scores_dict.items():
-                await conn.execute('''
-                    INSERT INTO country_scores (user_id, score)
-                    VALUES ($1, $2)
-                    ON CONFLICT (user_id) DO UPDATE SET score = EXCLUDED.score
-                ''', int(uid), score)
+            async with conn.transaction():
+                if rows:
+                    await conn.executemany('''
+                        INSERT INTO country_scores (user_id, score)
+                        VALUES ($1, $2)
+                        ON CONFLICT (user_id) DO UPDATE SET score = country_scores.score + EXCLUDED.score
+                    ''', rows)
+                if season_rows:
+                    await conn.executemany('''
+                        INSERT INTO country_season_scores (guild_id, season, user_id, score)
+                        VALUES ($1, $2, $3, $4)
+                        ON CONFLICT (guild_id, season, user_id) DO UPDATE
+                        SET score = country_season_scores.score + EXCLUDED.score
+                    ''', season_rows)
+
+    async def load_country_seasons(self):
+        """Load each guild's current season and its scores, in the JSON file layout."""
+        seasons = {}
+        async with self.pool.acquire() as conn:
+            for row in await conn.fetch('SELECT * FROM country_seasons'):
+                seasons[str(row['guild_id'])] = {
+                    "season": row['season'],
+                    "started_at": row['started_at'].isoformat() if row['started_at'] else None,
+                    "scores": {}
+                }
+            rows = await conn.fetch('''
+                SELECT s.guild_id, s.user_id, s.score
+                FROM country_season_scores s
+                JOIN country_seasons c ON c.guild_id = s.guild_id AND c.season = s.season
+            ''')
+            for row in rows:
+                seasons[str(row['guild_id'])]["scores"][str(row['user_id'])] = row['score']
+        return seasons
+
+    async def save_country_seasons(self, seasons):
+        """Upsert each guild's current season from {guild_id: (season, started_at)}."""
+        if not self.connected:
+            return
+        rows = [
+            (int(guild_id), season, datetime.datetime.fromisoformat(started_at) if started_at else None)
+            for guild_id, (season, started_at) in seasons.items()
+        ]
+        if not rows:
+            return
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany('''
+                    INSERT INTO country_seasons (guild_id, season, started_at)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (guild_id) DO UPDATE SET
+                        season = EXCLUDED.season,
+                        started_at = EXCLUDED.started_at
+                ''', rows)
 
     # --- Shop items methods ---
     async def load_shop_items(self):
@@ -304,15 +625,79 @@ class Database:
         """Upsert shop items into database."""
         if not self.connected:
             return
+        rows = [
+            (category, item['name'], item['price'],
+             item.get('description', ''), item.get('emoji', '🛍️'))
+            for category, item_list in items_dict.items()
+            for item in item_list
+        ]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute('DELETE FROM shop_items')
+                await conn.copy_records_to_table(
+                    'shop_items', records=rows,
+                    columns=['category', 'item_name', 'price', 'description', 'emoji']
+                )
+
+    # --- Scheduled jobs methods ---
+    async def load_jobs(self):
+        """Load saved job state as {name: {"next_run", "last_run", "last_result"}}."""
+        jobs = {}
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('SELECT * FROM scheduled_jobs')
+            for row in rows:
+                jobs[row['name']] = {
+                    "next_run": row['next_run'].isoformat() if row['next_run'] else None,
+                    "last_run": row['last_run'].isoformat() if row['last_run'] else None,
+                    "last_result": row['last_result']
+                }
+        return jobs
+
+    async def save_jobs(self, jobs_dict):
+        """Upsert saved job state."""
+        if not self.connected:
+            return
+        rows = [
+            (name, datetime.datetime.fromisoformat(job["next_run"]),
+             datetime.datetime.fromisoformat(job["last_run"]) if job["last_run"] else None,
+             job["last_result"])
+            for name, job in jobs_dict.items()
+        ]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany('''
+                    INSERT INTO scheduled_jobs (name, next_run, last_run, last_result)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (name) DO UPDATE SET
+                        next_run = EXCLUDED.next_run,
+                        last_run = EXCLUDED.last_run,
+                        last_result = EXCLUDED.last_result
+                ''', rows)
+
+    # --- Payroll ledger methods ---
+    async def load_payroll_ledger(self):
+        """Load (run_date, {user_id}) for the latest payroll run."""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT run_date, user_id FROM payroll_ledger
+                WHERE run_date = (SELECT MAX(run_date) FROM payroll_ledger)
+            ''')
+        if not rows:
+            return None, set()
+        return rows[0]['run_date'].isoformat(), {row['user_id'] for row in rows}
+
+    async def record_payroll(self, run_date, user_ids):
+        """Add `user_ids` to the ledger for `run_date`, dropping older runs."""
+        if not self.connected:
+            return
+        day = datetime.date.fromisoformat(run_date)
         async with self.pool.acquire() as conn:
-            await conn.execute('DELETE FROM shop_items')
-            for category, item_list in items_dict.items():
-                for item in item_list:
-                    await conn.execute('''
-                        INSERT INTO shop_items (category, item_name, price, description, emoji)
-                        VALUES ($1, $2, $3, $4, $5)
-                    ''', category, item['name'], item['price'],
-                        item.get('description', ''), item.get('emoji', '🛍️'))
+            async with conn.transaction():
+                await conn.execute('DELETE FROM payroll_ledger WHERE run_date < $1', day)
+                await conn.executemany('''
+                    INSERT INTO payroll_ledger (run_date, user_id) VALUES ($1, $2)
+                    ON CONFLICT DO NOTHING
+                ''', [(day, uid) for uid in user_ids])
 
     # --- Role salaries methods ---
     async def load_role_salaries(self):
@@ -329,11 +714,12 @@ class Database:
         if not self.connected:
             return
         async with self.pool.acquire() as conn:
-            await conn.execute('DELETE FROM role_salaries')
-            for role, salary in salaries_dict.items():
-                await conn.execute('''
-                    INSERT INTO role_salaries (role_name, salary) VALUES ($1, $2)
-                ''', role, salary)
+            async with conn.transaction():
+                await conn.execute('DELETE FROM role_salaries')
+                await conn.copy_records_to_table(
+                    'role_salaries', records=list(salaries_dict.items()),
+                    columns=['role_name', 'salary']
+                )
 
     async def close(self):
         if self.pool:
@@ -349,7 +735,7 @@ def load_data():
     except:
         return {"afk_users": {}, "warnings": {}, "muted_users": {}}
 
-def load_economy():
+def read_economy_snapshot():
     try:
         with open(ECONOMY_FILE, "r") as f:
             return json.load(f)
@@ -363,6 +749,14 @@ def load_economy():
             "businesses": {}
         }
 
+def load_economy():
+    """Load the economy snapshot and replay the journal on top of it"""
+    economy = read_economy_snapshot()
+    replayed = replay_economy_journal(economy)
+    if replayed:
+        print(f"📒 Replayed {replayed} economy journal entries")
+    return economy
+
 def load_shop():
     try:
         with open(SHOP_FILE, "r") as f:
@@ -391,6 +785,13 @@ def load_country_scores():
     except:
         return {}
 
+def load_country_seasons():
+    try:
+        with open(COUNTRY_SEASONS_FILE, "r") as f:
+            return json.load(f)
+    except:
+        return {}
+
 def load_quarantine():
     try:
         with open(QUARANTINE_FILE, "r") as f:
@@ -412,12 +813,12 @@ def load_last_salary():
     except:
         return {"last_salary": "2000-01-01T00:00:00"}
 
-def load_last_business_profit():
+def load_jobs():
     try:
-        with open(LAST_BUSINESS_PROFIT_FILE, "r") as f:
+        with open(JOBS_FILE, "r") as f:
             return json.load(f)
     except:
-        return {"last_business_profit": "2000-01-01T00:00:00"}
+        return {}
 
 # NEW: Load/save simple businesses
 def load_simple_businesses():
@@ -432,42 +833,84 @@ def save_simple_businesses():
         json.dump(bot.simple_businesses, f, indent=2)
 
 # ===== DATA SAVING FUNCTIONS (JSON) =====
+def write_json_atomic(path, payload):
+    """Write compact JSON to a temp file, fsync it and rename it over `path`"""
+    text = json.dumps(payload, separators=(",", ":"))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+async def async_write_json(path, build_payload):
+    """Snapshot on the loop, then serialize and write in a worker thread"""
+    payload = build_payload()
+    try:
+        await asyncio.to_thread(write_json_atomic, path, payload)
+    except RuntimeError:
+        # A nested dict changed while the thread was encoding it; retry on the loop
+        payload = build_payload()
+        write_json_atomic(path, payload)
+    return payload
+
+def data_snapshot():
+    return {
+        "afk_users": dict(bot.afk_users),
+        "warnings": dict(bot.warnings),
+        "muted_users": dict(bot.muted_users)
+    }
+
+def country_scores_snapshot():
+    return dict(bot.country_board.scores)
+
+def country_seasons_snapshot():
+    """Each guild's current season with its scores; past seasons live only in the database"""
+    return {
+        str(guild_id): {"season": board.season, "started_at": board.started_at, "scores": dict(board.scores)}
+        for guild_id, board in bot.season_boards.items()
+    }
+
+def season_pointers():
+    return {guild_id: (board.season, board.started_at) for guild_id, board in bot.season_boards.items()}
+
+def quarantine_snapshot():
+    return {
+        "quarantined_users": dict(bot.quarantined_users),
+        "quarantine_channels": dict(bot.quarantine_channels)
+    }
+
+def role_salaries_snapshot():
+    """Stored salary map: "default", role IDs as strings, and any unmatched legacy names"""
+    salaries = {"default": bot.default_salary}
+    salaries.update(bot.unmatched_salaries)
+    salaries.update((str(role_id), salary) for role_id, salary in bot.role_salaries.items())
+    return salaries
+
 def save_data():
-    with open(DATA_FILE, "w") as f:
-        json.dump({
-            "afk_users": bot.afk_users,
-            "warnings": bot.warnings,
-            "muted_users": bot.muted_users
-        }, f, indent=2)
+    data_file_writer.request()
 
 def save_economy():
-    with open(ECONOMY_FILE, "w") as f:
-        json.dump({
-            "wallets": bot.wallets,
-            "banks": bot.banks,
-            "last_daily": bot.last_daily,
-            "last_work": bot.last_work,
-            "owned_items": bot.owned_items,
-            "businesses": bot.businesses
-        }, f, indent=2)
+    economy_file_writer.request()
 
 def save_country_scores():
-    with open(COUNTRY_SCORES_FILE, "w") as f:
-        json.dump(bot.country_scores, f, indent=2)
+    scores_file_writer.request()
+    seasons_file_writer.request()
+
+def save_country_seasons():
+    seasons_writer.request()
+    seasons_file_writer.request()
 
 def save_quarantine():
-    with open(QUARANTINE_FILE, "w") as f:
-        json.dump({
-            "quarantined_users": bot.quarantined_users,
-            "quarantine_channels": bot.quarantine_channels
-        }, f, indent=2)
+    quarantine_file_writer.request()
 
-def save_businesses():
-    with open(BUSINESS_FILE, "w") as f:
-        json.dump({
-            "businesses": bot.businesses,
-            "business_types": bot.business_types
-        }, f, indent=2)
+def save_jobs():
+    jobs_writer.request()
+    jobs_file_writer.request()
+
+def save_role_salaries():
+    salaries_writer.request()
+    salaries_file_writer.request()
 
 def save_last_salary(last_salary_time):
     with open(LAST_SALARY_FILE, "w") as f:
@@ -486,10 +929,7 @@ def save_last_business_profit(last_profit_time):
 # ===== ASYNC DATABASE SAVE WRAPPERS =====
 async def async_save_economy():
     if db.connected:
-        await db.save_economy(
-            bot.wallets, bot.banks, bot.last_daily, bot.last_work,
-            bot.owned_items, bot.businesses
-        )
+        await bot.economy.flush(db)
 
 async def async_save_warnings():
     if db.connected:
@@ -500,30 +940,1372 @@ async def async_save_quarantine():
         await db.save_quarantine(bot.quarantined_users)
 
 async def async_save_country_scores():
+    if not db.connected:
+        bot.score_deltas.clear()
+        bot.season_deltas.clear()
+        return
+    deltas, bot.score_deltas = bot.score_deltas, {}
+    season_deltas, bot.season_deltas = bot.season_deltas, {}
+    try:
+        await db.add_country_scores(deltas, season_deltas)
+    except Exception:
+        for uid, delta in deltas.items():
+            bot.score_deltas[uid] = bot.score_deltas.get(uid, 0) + delta
+        for key, delta in season_deltas.items():
+            bot.season_deltas[key] = bot.season_deltas.get(key, 0) + delta
+        raise
+
+async def async_save_country_seasons():
     if db.connected:
-        await db.save_country_scores(bot.country_scores)
+        await db.save_country_seasons(season_pointers())
 
 async def async_save_shop_items():
     if db.connected:
         await db.save_shop_items(bot.shop_items)
 
+async def async_save_jobs():
+    if db.connected:
+        await db.save_jobs(bot.scheduler.snapshot())
+
 async def async_save_role_salaries():
     if db.connected:
-        await db.save_role_salaries(bot.role_salaries)
+        await db.save_role_salaries(role_salaries_snapshot())
+
+# ===== WRITE-BEHIND SAVE QUEUE =====
+SAVE_RETRY_MAX_DELAY = 300   # seconds; failed saves retry with doubling delays up to this
+class SaveWriter:
+    """Coalesces save requests for one data domain into a single background flush"""
+
+    def __init__(self, name, save_func, delay=2.0):
+        self.name = name
+        self.save_func = save_func
+        self.delay = delay
+        self.pending = False
+        self.task = None
+        self.flush_task = None
+        self.lock = asyncio.Lock()
+
+    def request(self):
+        """Schedule a flush; requests made before it runs share the same write"""
+        self.pending = True
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        delay = self.delay
+        while self.pending:
+            await asyncio.sleep(delay)
+            if not self.pending:
+                break   # flush_now() already wrote it
+            self.pending = False
+            if await self._flush():
+                delay = self.delay
+            else:
+                # The unsaved data is still queued; retry instead of waiting for the next change
+                self.pending = True
+                delay = min(delay * 2, SAVE_RETRY_MAX_DELAY)
+
+    async def _flush(self):
+        async with self.lock:
+            try:
+                await self.save_func()
+                return True
+            except Exception as e:
+                print(f"⚠️ Failed to save {self.name}: {e}")
+                return False
+
+    async def flush_now(self):
+        """Write immediately, after any flush already in progress"""
+        self.pending = False
+        if not await self._flush():
+            self.request()
+
+    def flush_soon(self):
+        """Start a pending flush now instead of waiting out the delay"""
+        if self.pending and (self.flush_task is None or self.flush_task.done()):
+            self.flush_task = asyncio.create_task(self.flush_now())
+
+economy_writer = SaveWriter("economy", async_save_economy)
+warnings_writer = SaveWriter("warnings", async_save_warnings)
+quarantine_writer = SaveWriter("quarantine", async_save_quarantine)
+scores_writer = SaveWriter("country scores", async_save_country_scores, delay=10.0)   # also flushed at round end
+shop_writer = SaveWriter("shop items", async_save_shop_items)
+salaries_writer = SaveWriter("role salaries", async_save_role_salaries)
+jobs_writer = SaveWriter("scheduled jobs", async_save_jobs)
+seasons_writer = SaveWriter("country seasons", async_save_country_seasons)
+
+data_file_writer = SaveWriter("bot data file", lambda: async_write_json(DATA_FILE, data_snapshot), delay=1.0)
+economy_file_writer = SaveWriter("economy file", lambda: compact_economy_journal(), delay=1.0)
+scores_file_writer = SaveWriter("country scores file", lambda: async_write_json(COUNTRY_SCORES_FILE, country_scores_snapshot), delay=10.0)
+seasons_file_writer = SaveWriter("country seasons file", lambda: async_write_json(COUNTRY_SEASONS_FILE, country_seasons_snapshot), delay=10.0)
+quarantine_file_writer = SaveWriter("quarantine file", lambda: async_write_json(QUARANTINE_FILE, quarantine_snapshot), delay=1.0)
+jobs_file_writer = SaveWriter("jobs file", lambda: async_write_json(JOBS_FILE, bot.scheduler.snapshot), delay=1.0)
+salaries_file_writer = SaveWriter("role salaries file", lambda: async_write_json(ROLE_SALARIES_FILE, role_salaries_snapshot), delay=1.0)
+
+save_writers = (
+    economy_writer, warnings_writer, quarantine_writer, scores_writer, shop_writer, salaries_writer,
+    jobs_writer, seasons_writer, data_file_writer, economy_file_writer, scores_file_writer,
+    seasons_file_writer, quarantine_file_writer, jobs_file_writer, salaries_file_writer
+)
+
+async def flush_all_saves():
+    """Flush every pending save (used on shutdown)"""
+    flush_economy_journal()
+    for writer in save_writers:
+        await writer.flush_now()
+
+# ===== ECONOMY JOURNAL =====
+ECONOMY_FIELDS = ("wallets", "banks", "last_daily", "last_work", "owned_items", "businesses")
+
+def apply_economy_entry(economy, entry):
+    """Apply one journal entry to a {field: {user_id: value}} economy dict"""
+    uid = entry.get("uid")
+    for credit_uid, amount in entry.get("bank_credits", {}).items():
+        economy["banks"][credit_uid] = economy["banks"].get(credit_uid, 0) + amount
+    if entry.get("wallet_delta"):
+        economy["wallets"][uid] = economy["wallets"].get(uid, 0) + entry["wallet_delta"]
+    if entry.get("bank_delta"):
+        economy["banks"][uid] = economy["banks"].get(uid, 0) + entry["bank_delta"]
+    if "add_item" in entry:
+        category, item = entry["add_item"]
+        economy["owned_items"].setdefault(uid, {}).setdefault(category, []).append(item)
+    for field, value in entry.get("set", {}).items():
+        if value is None:
+            economy[field].pop(uid, None)
+        else:
+            economy[field][uid] = value
+
+def iter_economy_journal():
+    """Yield the journal's entries in order, skipping torn lines"""
+    try:
+        with open(ECONOMY_JOURNAL_FILE, "r") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crash mid-append
+    except FileNotFoundError:
+        return
+
+def replay_economy_journal(economy, upto=None):
+    """Apply journal entries newer than the snapshot's journal_seq (up to `upto`)"""
+    for field in ECONOMY_FIELDS:
+        economy.setdefault(field, {})
+    seq = economy.get("journal_seq", 0)
+    replayed = 0
+    for entry in iter_economy_journal():
+        if upto is not None and entry["seq"] > upto:
+            break
+        if entry["seq"] > seq:
+            apply_economy_entry(economy, entry)
+            seq = entry["seq"]
+            replayed += 1
+    economy["journal_seq"] = seq
+    return replayed
+
+def read_economy_journal(since):
+    """Journal entries with seq > `since`"""
+    return [entry for entry in iter_economy_journal() if entry["seq"] > since]
+
+async def replay_journal_into_store(since):
+    """
+    Re-apply journal entries newer than the database's committed seq to the
+    store (Supabase mode), so changes made just before a crash still reach
+    the database. Returns the number of entries replayed.
+    """
+    flush_economy_journal()
+    entries = await asyncio.to_thread(read_economy_journal, since)
+    if not entries:
+        return 0
+    user_ids = set()
+    for entry in entries:
+        user_ids.update(int(uid) for uid in entry.get("bank_credits", {}))
+        if entry.get("uid"):
+            user_ids.add(int(entry["uid"]))
+    accounts = await bot.economy.prefetch(user_ids)
+    for entry in entries:
+        for uid, amount in entry.get("bank_credits", {}).items():
+            account = accounts[int(uid)]
+            account.bank += amount
+            bot.economy.mark_dirty(account, balances=True)
+        if not entry.get("uid"):
+            continue
+        account = accounts[int(entry["uid"])]
+        account.wallet += entry.get("wallet_delta", 0)
+        account.bank += entry.get("bank_delta", 0)
+        add_item = tuple(entry["add_item"]) if "add_item" in entry else None
+        if add_item:
+            account.owned_items.setdefault(add_item[0], []).append(add_item[1])
+        fields = entry.get("set", {})
+        for field, value in fields.items():
+            setattr(account, ACCOUNT_FIELDS[field], iso_to_epoch(value) if field in COOLDOWN_FIELDS else value)
+        bot.economy.mark_dirty(
+            account,
+            balances=bool(entry.get("wallet_delta") or entry.get("bank_delta")
+                          or not COOLDOWN_FIELDS.isdisjoint(fields)),
+            item=add_item,
+            business="businesses" in fields
+        )
+    bot.journal_seq = max(bot.journal_seq, entries[-1]["seq"])
+    economy_writer.request()
+    return len(entries)
+
+def fold_economy_journal(seq):
+    """Fold journal entries up to `seq` into the snapshot file (runs in a worker thread)"""
+    economy = read_economy_snapshot()
+    replay_economy_journal(economy, upto=seq)
+    write_json_atomic(ECONOMY_FILE, economy)
+
+def open_economy_journal():
+    f = open(ECONOMY_JOURNAL_FILE, "a+")
+    # Terminate a torn last line so the next entry starts on its own line
+    if f.tell() > 0:
+        f.seek(f.tell() - 1)
+        if f.read(1) != "\n":
+            f.write("\n")
+    return f
+
+def flush_economy_journal():
+    bot.journal_flush_scheduled = False
+    if bot.journal_file:
+        bot.journal_file.flush()
+
+def append_economy_journal(entry):
+    """O(1) append; the buffer is flushed once per event loop iteration"""
+    if bot.journal_file is None:
+        bot.journal_file = open_economy_journal()
+    bot.journal_file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    if not bot.journal_flush_scheduled:
+        bot.journal_flush_scheduled = True
+        asyncio.get_running_loop().call_soon(flush_economy_journal)
+
+def trim_economy_journal(seq):
+    """Drop journal entries that are already folded into the snapshot"""
+    if bot.journal_file:
+        bot.journal_file.close()
+        bot.journal_file = None
+    try:
+        with open(ECONOMY_JOURNAL_FILE, "r") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return
+    keep = []
+    for line in lines:
+        try:
+            if json.loads(line)["seq"] > seq:
+                keep.append(line)
+        except ValueError:
+            continue
+    tmp_path = f"{ECONOMY_JOURNAL_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(keep)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, ECONOMY_JOURNAL_FILE)
+
+async def compact_economy_journal():
+    """
+    Fold the journal into economy_data.json, then trim the folded entries.
+    With Supabase the database is the snapshot: only entries it has
+    committed are trimmed and the JSON file is left alone.
+    """
+    flush_economy_journal()
+    if bot.economy.database is not None:
+        seq = bot.economy.committed_seq
+        if seq > bot.journal_compacted_seq:
+            trim_economy_journal(seq)
+            bot.journal_compacted_seq = seq
+        return
+    seq = bot.journal_seq
+    await asyncio.to_thread(fold_economy_journal, seq)
+    trim_economy_journal(seq)
+    bot.journal_compacted_seq = seq
+
+def update_economy(account, reason, wallet=0, bank=0, add_item=None, **fields):
+    """
+    Apply a wallet/bank delta (and optional field values) to one account,
+    journal it and queue the database save.
+    add_item=(category, name) appends one item to the user's inventory.
+    Pass businesses=None to remove the user's business.
+    """
+    bot.journal_seq += 1
+    entry = {
+        "seq": bot.journal_seq,
+        "ts": datetime.datetime.now().isoformat(),
+        "uid": str(account.user_id),
+        "reason": reason
+    }
+    account.wallet += wallet
+    account.bank += bank
+    if wallet:
+        entry["wallet_delta"] = wallet
+    if bank:
+        entry["bank_delta"] = bank
+    if (wallet or bank) and bot.economy.wealth is not None:
+        bot.economy.wealth.update(account.user_id, account.wallet + account.bank)
+    if add_item:
+        category, item = add_item
+        account.owned_items.setdefault(category, []).append(item)
+        entry["add_item"] = [category, item]
+    if fields:
+        for field, value in fields.items():
+            setattr(account, ACCOUNT_FIELDS[field], value)
+        entry["set"] = {
+            field: epoch_to_iso(value) if field in COOLDOWN_FIELDS else value
+            for field, value in fields.items()
+        }
+    append_economy_journal(entry)
+    bot.economy.mark_dirty(
+        account,
+        balances=bool(wallet or bank or not COOLDOWN_FIELDS.isdisjoint(fields)),
+        item=add_item,
+        business="businesses" in fields
+    )
+    economy_writer.request()
+    if bot.journal_seq - bot.journal_compacted_seq >= JOURNAL_COMPACT_EVERY:
+        save_economy()
+
+async def credit_banks(credits, reason, payroll_date=None):
+    """
+    Add {user_id: amount} to many bank balances at once. Each chunk is one
+    journal entry and one prefetch, and the loop yields between chunks.
+    With payroll_date, each chunk drops anyone already in the ledger and is
+    written to it before it is credited, so an interrupted run can never pay
+    anyone twice. Returns the {user_id: amount} actually credited.
+    """
+    items = list(credits.items())
+    credited = {}
+    for start in range(0, len(items), PAYROLL_CHUNK):
+        chunk = items[start:start + PAYROLL_CHUNK]
+        if payroll_date:
+            if bot.payroll_date == payroll_date:
+                chunk = [(uid, amount) for uid, amount in chunk if uid not in bot.payroll_paid]
+            if not chunk:
+                continue
+            await record_payroll(payroll_date, [uid for uid, _ in chunk])
+        accounts = await bot.economy.prefetch(uid for uid, _ in chunk)
+        bot.journal_seq += 1
+        append_economy_journal({
+            "seq": bot.journal_seq,
+            "ts": datetime.datetime.now().isoformat(),
+            "reason": reason,
+            "bank_credits": {str(uid): amount for uid, amount in chunk}
+        })
+        totals = {}
+        for uid, amount in chunk:
+            account = accounts[uid]
+            account.bank += amount
+            totals[uid] = account.wallet + account.bank
+            bot.economy.mark_dirty(account, balances=True)
+        # Index this chunk before yielding, so later commands' changes aren't overwritten
+        if bot.economy.wealth is not None:
+            bot.economy.wealth.update_many(totals)
+        credited.update(chunk)
+        economy_writer.request()
+        await asyncio.sleep(0)
+    return credited
+
+# ===== ECONOMY STORE =====
+ECONOMY_CACHE_SIZE = 5000   # accounts kept in memory when backed by Supabase
+
+# JSON snapshot field -> UserAccount attribute
+ACCOUNT_FIELDS = {
+    "last_daily": "last_daily",
+    "last_work": "last_work",
+    "owned_items": "owned_items",
+    "businesses": "business"
+}
+# Cooldowns are epoch seconds in memory and ISO strings in JSON
+COOLDOWN_FIELDS = frozenset(("last_daily", "last_work"))
+
+def iso_to_epoch(value):
+    return datetime.datetime.fromisoformat(value).timestamp() if value else None
+
+def epoch_to_iso(value):
+    return datetime.datetime.fromtimestamp(value).isoformat() if value is not None else None
+
+def epoch_to_datetime(value):
+    return datetime.datetime.fromtimestamp(value) if value is not None else None
+
+class UserAccount:
+    """One user's economy record"""
+
+    __slots__ = ("user_id", "wallet", "bank", "last_daily", "last_work", "owned_items", "business",
+                 "__weakref__")
+
+    def __init__(self, user_id, wallet=0, bank=0, last_daily=None, last_work=None,
+                 owned_items=None, business=None):
+        self.user_id = user_id          # int snowflake
+        self.wallet = wallet
+        self.bank = bank
+        self.last_daily = last_daily    # epoch seconds or None
+        self.last_work = last_work
+        self.owned_items = owned_items if owned_items is not None else {}
+        self.business = business
+
+    @classmethod
+    def from_snapshot(cls, user_id, economy):
+        """Build an account from the JSON snapshot layout ({field: {user_id: value}})"""
+        uid = str(user_id)
+        return cls(
+            int(user_id),
+            economy["wallets"].get(uid, 0),
+            economy["banks"].get(uid, 0),
+            iso_to_epoch(economy["last_daily"].get(uid)),
+            iso_to_epoch(economy["last_work"].get(uid)),
+            economy["owned_items"].get(uid) or {},
+            economy["businesses"].get(uid) or None
+        )
+
+def accounts_from_economy(economy):
+    """Convert the JSON snapshot layout into {user_id: UserAccount}"""
+    user_ids = set()
+    for field in ECONOMY_FIELDS:
+        user_ids.update(economy[field])
+    return {int(uid): UserAccount.from_snapshot(uid, economy) for uid in user_ids}
+
+class WealthIndex:
+    """
+    Users ordered by total wealth (wallet + bank). Updated on every balance
+    change so top-N and rank lookups never sort the whole user base.
+    Only kept for the JSON fallback; with Supabase, !rich queries the
+    indexed economy table instead of holding every user in memory.
+    """
+
+    def __init__(self):
+        self.entries = SortedList()   # (-total, user_id), richest first
+        self.totals = {}              # user_id -> total
+
+    def reset(self, totals):
+        self.totals = {uid: total for uid, total in totals.items() if total > 0}
+        self.entries = SortedList((-total, uid) for uid, total in self.totals.items())
+
+    def update(self, user_id, total):
+        old = self.totals.pop(user_id, None)
+        if old is not None:
+            self.entries.remove((-old, user_id))
+        if total > 0:
+            self.totals[user_id] = total
+            self.entries.add((-total, user_id))
+
+    def update_many(self, totals):
+        """Apply many updates at once, rebuilding the index when that is cheaper"""
+        if len(totals) * 8 < len(self.totals):
+            for uid, total in totals.items():
+                self.update(uid, total)
+            return
+        merged = dict(self.totals)
+        merged.update(totals)
+        self.reset(merged)
+
+    def top(self, n):
+        """Return the `n` richest users as [(user_id, total)]"""
+        return [(uid, -neg_total) for neg_total, uid in self.entries.islice(0, n)]
+
+    def rank(self, user_id):
+        """Return the 1-based rank of `user_id`, or None if they have no money"""
+        total = self.totals.get(user_id)
+        if total is None:
+            return None
+        return self.entries.index((-total, user_id)) + 1
+
+    def __len__(self):
+        return len(self.entries)
+
+class EconomyStore:
+    """
+    Per-user economy records. When backed by the database, accounts are
+    loaded on first access and only the most recently used ones stay cached.
+    Changed accounts stay referenced in `dirty` until flushed, and in
+    `inflight` while that flush is being written, so evicting them never
+    loses a write or lets a stale database row be loaded over them.
+    An evicted account that a command still holds is found again through
+    `live`, so everyone shares one object per user.
+    """
+
+    def __init__(self, accounts=None):
+        self.accounts = OrderedDict(accounts or {})
+        self.live = weakref.WeakValueDictionary(self.accounts)   # user_id -> account still referenced anywhere
+        self.database = None
+        self.capacity = None   # None keeps every account (JSON fallback)
+        self.dirty = {}        # user_id -> account with unsaved changes
+        self.inflight = {}     # user_id -> account whose write hasn't committed yet
+        self.committed_seq = 0 # last journal seq the database is known to include
+        self.dirty_balances = set()
+        self.dirty_items = set()
+        self.dirty_businesses = set()
+        self.wealth = WealthIndex()
+        self.wealth.reset({uid: a.wallet + a.bank for uid, a in self.accounts.items()})
+
+    def attach(self, database, capacity, keep_loaded=False):
+        """Switch to loading accounts from the database on demand"""
+        self.database = database
+        self.capacity = capacity
+        self.wealth = None   # the database ranks wealth
+        if not keep_loaded:
+            self.accounts.clear()
+        self._evict()
+
+    def peek(self, user_id):
+        """Return the account if it is already in memory, else None"""
+        uid = int(user_id)
+        account = self.inflight.get(uid) or self.accounts.get(uid)
+        if account is None:
+            account = self.dirty.get(uid) or self.live.get(uid)
+        return account
+
+    async def get(self, user_id):
+        """Return the account for `user_id`, loading it if needed"""
+        uid = int(user_id)
+        account = self.accounts.get(uid)
+        if account is not None:
+            self.accounts.move_to_end(uid)
+            return account
+        account = self.peek(uid)
+        if account is None and self.database:
+            loaded = await self.database.load_accounts([uid])
+            # Another command may have loaded it while we were waiting
+            account = self.peek(uid) or loaded.get(uid)
+        if account is None:
+            account = UserAccount(uid)
+        self._insert(uid, account)
+        return account
+
+    async def prefetch(self, user_ids):
+        """
+        Load many accounts with one query and return them as {user_id: account}.
+        Use the returned accounts before the next await; they may be evicted later.
+        """
+        accounts = {}
+        missing = []
+        for user_id in user_ids:
+            uid = int(user_id)
+            account = self.peek(uid)
+            if account is None:
+                missing.append(uid)
+            else:
+                accounts[uid] = account
+        loaded = {}
+        if missing and self.database:
+            loaded = await self.database.load_accounts(missing)
+        for uid in missing:
+            account = self.peek(uid) or loaded.get(uid) or UserAccount(uid)
+            self._insert(uid, account)
+            accounts[uid] = account
+        return accounts
+
+    def _insert(self, uid, account):
+        self.accounts[uid] = account
+        self.live[uid] = account
+        self.accounts.move_to_end(uid)
+        self._evict()
+
+    def _evict(self):
+        if self.capacity is None:
+            return
+        while len(self.accounts) > self.capacity:
+            uid, _ = self.accounts.popitem(last=False)
+            if uid in self.dirty:
+                economy_writer.request()   # write back the evicted changes
+
+    def mark_dirty(self, account, balances=False, item=None, business=False):
+        uid = account.user_id
+        self.dirty[uid] = account
+        if balances:
+            self.dirty_balances.add(uid)
+        if item:
+            self.dirty_items.add((uid, *item))
+        if business:
+            self.dirty_businesses.add(uid)
+
+    def mark_all_dirty(self):
+        """Queue every loaded account for the next flush (JSON -> database migration)"""
+        for account in self.accounts.values():
+            self.mark_dirty(account, balances=True, business=account.business is not None)
+            for category, items in account.owned_items.items():
+                for item in set(items):
+                    self.dirty_items.add((account.user_id, category, item))
+
+    async def flush(self, database):
+        """Write every dirty account to the database, recording the journal seq they include"""
+        if not self.dirty:
+            return
+        # Every journal entry up to here is either committed already or in this batch
+        seq = bot.journal_seq
+        dirty, self.dirty = self.dirty, {}
+        self.inflight.update(dirty)
+        balances, self.dirty_balances = self.dirty_balances, set()
+        items, self.dirty_items = self.dirty_items, set()
+        businesses, self.dirty_businesses = self.dirty_businesses, set()
+        try:
+            await database.save_accounts(dirty, balances, items, businesses, seq)
+            self.committed_seq = seq
+        except Exception:
+            for uid, account in dirty.items():
+                self.dirty.setdefault(uid, account)
+            self.dirty_balances |= balances
+            self.dirty_items |= items
+            self.dirty_businesses |= businesses
+            raise
+        finally:
+            # Committed, or back in `dirty` after a failure: either way visible again
+            for uid, account in dirty.items():
+                if self.inflight.get(uid) is account:
+                    del self.inflight[uid]
+
+# ===== PAYROLL =====
+PAYROLL_CHUNK = 1000         # accounts credited per journal entry / loop yield; well under ECONOMY_CACHE_SIZE
+PAYROLL_MEMBER_BATCH = 5000  # members checked between loop yields in one guild
+payroll_lock = asyncio.Lock()   # one payroll run at a time, scheduled or manual
+
+def role_id_from_key(key):
+    """Return the role ID of a "123" or "<@&123>" salary key, or None for a role name"""
+    if key.startswith("<@&") and key.endswith(">"):
+        key = key[3:-1]
+    return int(key) if key.isdigit() else None
+
+def set_role_salaries(stored):
+    """
+    Load a stored salary map into bot.role_salaries ({role_id: salary}).
+    Legacy role-name keys are kept in bot.unmatched_salaries until
+    match_salary_role_names() can find the roles. Returns True if the map
+    used "<@&id>" mention keys and should be saved back in the ID format.
+    """
+    bot.default_salary = stored.get("default", 1000)
+    bot.role_salaries = {}
+    bot.unmatched_salaries = {}
+    legacy = False
+    for key, salary in stored.items():
+        if key == "default":
+            continue
+        role_id = role_id_from_key(key)
+        if role_id is None:
+            bot.unmatched_salaries[key] = salary
+        else:
+            bot.role_salaries[role_id] = salary
+            legacy = legacy or key != str(role_id)
+    rebuild_salary_index()
+    return legacy
+
+def match_salary_role_names(guilds):
+    """Move legacy role-name salaries onto the IDs of the roles with those names"""
+    matched = set()
+    for guild in guilds:
+        for role in guild.roles:
+            if role.name in bot.unmatched_salaries:
+                bot.role_salaries.setdefault(role.id, bot.unmatched_salaries[role.name])
+                matched.add(role.name)
+    for name in matched:
+        del bot.unmatched_salaries[name]
+    if matched:
+        rebuild_salary_index()
+    return bool(matched)
+
+def rebuild_salary_index():
+    """Sort salaried roles best-paid first, dropping any that don't beat the default"""
+    bot.salary_index = tuple(sorted(
+        ((role_id, salary) for role_id, salary in bot.role_salaries.items() if salary > bot.default_salary),
+        key=lambda pair: pair[1],
+        reverse=True
+    ))
+
+async def guild_salaries(guild, best):
+    """
+    Merge the best salary of each human member of `guild` into `best`
+    ({user_id: (salary, role name)}). Each member's roles are checked against
+    this guild's slice of the salary index, stopping at the first (best-paid)
+    match; members already on at least this guild's top salary are skipped.
+    Yields to the event loop every PAYROLL_MEMBER_BATCH members.
+    """
+    index = [
+        (role.id, salary, role.name)
+        for role, salary in ((guild.get_role(role_id), salary) for role_id, salary in bot.salary_index)
+        if role
+    ]
+    ceiling = index[0][1] if index else bot.default_salary
+    for i, member in enumerate(guild.members, 1):
+        if i % PAYROLL_MEMBER_BATCH == 0:
+            await asyncio.sleep(0)
+        if member.bot:
+            continue
+        current = best.get(member.id)
+        if current and current[0] >= ceiling:
+            continue
+        salary, role_name = bot.default_salary, "Default"
+        for role_id, role_salary, name in index:
+            if member.get_role(role_id):
+                salary, role_name = role_salary, name
+                break
+        if current is None or salary > current[0]:
+            best[member.id] = (salary, role_name)
+
+def read_payroll_ledger():
+    """Return (run_date, {user_id}) for the latest run recorded in the ledger file"""
+    run_date = None
+    paid = set()
+    try:
+        with open(PAYROLL_LEDGER_FILE, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crash mid-append
+                if entry["date"] != run_date:
+                    run_date = entry["date"]
+                    paid = set()
+                paid.update(entry["ids"])
+    except FileNotFoundError:
+        pass
+    return run_date, paid
+
+def append_payroll_ledger(line, start_new):
+    with open(PAYROLL_LEDGER_FILE, "w" if start_new else "a") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+def merge_payroll_ledger(run_date, paid):
+    """Combine a loaded ledger with the one in memory, keeping the latest run date"""
+    if run_date is None or (bot.payroll_date and run_date < bot.payroll_date):
+        return
+    if run_date != bot.payroll_date:
+        bot.payroll_date = run_date
+        bot.payroll_paid = set()
+    bot.payroll_paid |= paid
+
+async def record_payroll(run_date, user_ids):
+    """Mark `user_ids` as paid for `run_date` in Supabase and the ledger file"""
+    if db.connected:
+        await db.record_payroll(run_date, user_ids)
+    start_new = run_date != bot.payroll_date
+    if start_new:
+        bot.payroll_date = run_date
+        bot.payroll_paid = set()
+    bot.payroll_paid.update(user_ids)
+    line = json.dumps({"date": run_date, "ids": user_ids}, separators=(",", ":")) + "\n"
+    await asyncio.to_thread(append_payroll_ledger, line, start_new)
+
+async def run_payroll():
+    """
+    Pay every member of every guild their best salary once per day, even if
+    they share several guilds with the bot or payroll is run again.
+    Returns (salaries_given, total_amount, {role name: {"count", "total"}}).
+    """
+    async with payroll_lock:
+        run_date = datetime.date.today().isoformat()
+        best = {}
+        for guild in bot.guilds:
+            await guild_salaries(guild, best)
+            await asyncio.sleep(0)
+
+        already_paid = bot.payroll_paid if bot.payroll_date == run_date else set()
+        credits = {user_id: salary for user_id, (salary, _) in best.items() if user_id not in already_paid}
+        credited = await credit_banks(credits, "salary", payroll_date=run_date)
+
+    salary_details = {}
+    for user_id, salary in credited.items():
+        details = salary_details.setdefault(best[user_id][1], {"count": 0, "total": 0})
+        details["count"] += 1
+        details["total"] += salary
+    return len(credited), sum(credited.values()), salary_details
+
+# ===== JOB SCHEDULER =====
+class JobScheduler:
+    """
+    Runs periodic jobs at exact times from a min-heap of next-run times.
+    Job state is saved to Supabase and JOBS_FILE after every run, so a
+    restart resumes the schedule. Runs missed while the bot was offline are
+    coalesced into one catch-up run.
+    """
+
+    def __init__(self):
+        self.jobs = {}        # name -> (func, interval in seconds)
+        self.state = {}       # name -> {"next_run", "last_run", "last_result"}, epoch seconds
+        self.heap = []        # (next_run, name)
+        self.running = set()
+        self.wakeup = None
+        self.task = None
+
+    def add(self, name, func, interval, first_run=None):
+        self.jobs[name] = (func, interval)
+        self.state.setdefault(name, {
+            "next_run": first_run if first_run is not None else time.time(),
+            "last_run": None,
+            "last_result": None
+        })
+
+    def restore(self, stored):
+        """Merge saved job state (ISO timestamps), keeping whichever copy ran last"""
+        for name, saved in stored.items():
+            if name not in self.jobs:
+                continue   # job no longer exists
+            if not saved.get("next_run"):
+                continue   # unusable row; keep the schedule from add()
+            saved = {
+                "next_run": iso_to_epoch(saved["next_run"]),
+                "last_run": iso_to_epoch(saved.get("last_run")),
+                "last_result": saved.get("last_result")
+            }
+            current = self.state.get(name)
+            if current is None or (saved["last_run"] or 0) >= (current["last_run"] or 0):
+                self.state[name] = saved
+        self._rebuild()
+
+    def snapshot(self):
+        return {
+            name: {
+                "next_run": epoch_to_iso(state["next_run"]),
+                "last_run": epoch_to_iso(state["last_run"]),
+                "last_result": state["last_result"]
+            }
+            for name, state in self.state.items()
+        }
+
+    def start(self):
+        if self.task and not self.task.done():
+            return
+        self.wakeup = asyncio.Event()
+        self._rebuild()
+        self.task = asyncio.create_task(self._run())
+
+    def postpone(self, name):
+        """Push a job's next run one full interval from now"""
+        self.state[name]["next_run"] = time.time() + self.jobs[name][1]
+        self._rebuild()
+        save_jobs()
+
+    def _rebuild(self):
+        self.heap = [(self.state[name]["next_run"], name) for name in self.jobs if name not in self.running]
+        heapq.heapify(self.heap)
+        if self.wakeup:
+            self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            if not self.heap:
+                delay = None
+            else:
+                next_run, name = self.heap[0]
+                delay = next_run - time.time()
+                if delay <= 0:
+                    heapq.heappop(self.heap)
+                    await self._run_job(name)
+                    continue
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, name):
+        func, interval = self.jobs[name]
+        state = self.state[name]
+        self.running.add(name)
+        try:
+            result = await func()
+        except Exception as e:
+            print(f"⚠️ Job {name} failed: {e}")
+            result = f"Failed: {e}"
+        finally:
+            self.running.discard(name)
+        now = time.time()
+        next_run = state["next_run"] + interval
+        if next_run <= now:
+            # Missed runs while offline: realign to the schedule instead of replaying each one
+            next_run += ((now - next_run) // interval + 1) * interval
+        state.update(next_run=next_run, last_run=now, last_result=result)
+        heapq.heappush(self.heap, (next_run, name))
+        save_jobs()
+
+# ===== MUTE EXPIRY =====
+class MuteScheduler:
+    """
+    Unmutes users when their mute expires. A min-heap of (unmute time, user)
+    rebuilt from bot.muted_users on startup lets one task sleep until the
+    earliest expiry. Entries made stale by !unmute or a re-mute are skipped
+    when they are popped.
+    """
+
+    def __init__(self):
+        self.heap = []        # (unmute epoch, user_id, unmute_at ISO string)
+        self.wakeup = None
+        self.task = None
+
+    def schedule(self, user_id, unmute_at):
+        entry = (iso_to_epoch(unmute_at), user_id, unmute_at)
+        heapq.heappush(self.heap, entry)
+        if self.wakeup and self.heap[0] is entry:
+            self.wakeup.set()   # new earliest expiry
+
+    def start(self):
+        if self.task and not self.task.done():
+            return
+        self.wakeup = asyncio.Event()
+        self.heap = []
+        for user_id, data in list(bot.muted_users.items()):
+            try:
+                self.heap.append((iso_to_epoch(data["unmute_at"]), user_id, data["unmute_at"]))
+            except:
+                del bot.muted_users[user_id]
+        heapq.heapify(self.heap)
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            delay = self.heap[0][0] - time.time() if self.heap else None
+            if delay is not None and delay <= 0:
+                _, user_id, unmute_at = heapq.heappop(self.heap)
+                data = bot.muted_users.get(user_id)
+                if data and data["unmute_at"] == unmute_at:
+                    await expire_mute(user_id, data)
+                continue
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+def get_mute_role(guild):
+    """Return the guild's Muted role, looking it up by name only on a cache miss"""
+    role = guild.get_role(bot.mute_roles.get(guild.id, 0))
+    if role is None:
+        role = discord.utils.get(guild.roles, name="Muted")
+        if role:
+            bot.mute_roles[guild.id] = role.id
+    return role
+
+async def expire_mute(user_id, data):
+    del bot.muted_users[user_id]
+    save_data()
+    guild = bot.get_guild(data["guild_id"])
+    member = guild.get_member(int(user_id)) if guild else None
+    mute_role = get_mute_role(guild) if guild else None
+    if not member or not mute_role or not member.get_role(mute_role.id):
+        return
+    try:
+        await member.remove_roles(mute_role, reason="Mute expired")
+    except:
+        return
+    print(f"🔇 Automatically unmuted {member}")
+    channel = bot.get_channel(data["channel_id"]) if data.get("channel_id") else None
+    if channel:
+        try:
+            await channel.send(f"🔊 {member.mention} has been automatically unmuted.", delete_after=10)
+        except:
+            pass
+
+# ===== NAME RESOLVER =====
+NAME_CACHE_TTL = 3600      # seconds a fetched username stays cached
+NAME_CACHE_SIZE = 10000
+
+class NameResolver:
+    """
+    Resolve user IDs to usernames for leaderboards and lists.
+    Checks the guild member cache, then discord.py's user cache, then a
+    TTL cache of earlier lookups, and only then makes one REST call per ID.
+    """
+
+    def __init__(self, ttl, capacity):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.names = OrderedDict()   # user_id -> (name, expires_at)
+        self.pending = {}            # user_id -> in-flight fetch task
+
+    async def _fetch(self, user_id):
+        try:
+            name = (await bot.fetch_user(user_id)).name
+        except discord.NotFound:
+            name = None
+        self.names[user_id] = (name, time.monotonic() + self.ttl)
+        self.names.move_to_end(user_id)
+        while len(self.names) > self.capacity:
+            self.names.popitem(last=False)
+        return name
+
+    async def resolve(self, user_id, guild=None):
+        """Return the username of `user_id`, or None if it can't be found"""
+        user_id = int(user_id)
+        member = guild.get_member(user_id) if guild else None
+        user = member or bot.get_user(user_id)
+        if user:
+            return user.name
+        entry = self.names.get(user_id)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]   # None for accounts Discord no longer knows
+        task = self.pending.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(user_id))
+            self.pending[user_id] = task
+            task.add_done_callback(lambda _: self.pending.pop(user_id, None))
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            return None
+
+    async def resolve_many(self, user_ids, guild=None):
+        """Resolve several IDs concurrently, returning {user_id: name or None}"""
+        user_ids = list(dict.fromkeys(int(uid) for uid in user_ids))
+        names = await asyncio.gather(*(self.resolve(uid, guild) for uid in user_ids))
+        return dict(zip(user_ids, names))
+
+# ===== MESSAGE INTEREST INDEX =====
+class GuildInterest:
+    """The per-guild state on_message has to check: quarantined users and game channels"""
+
+    __slots__ = ("quarantined", "game_channels")
+
+    def __init__(self, quarantined, game_channels):
+        self.quarantined = quarantined          # set of int user IDs
+        self.game_channels = game_channels      # set of int channel IDs with a running game
+
+def refresh_guild_interest(guild_id):
+    """Recompute one guild's entry after its quarantine or game state changes"""
+    key = str(guild_id)
+    quarantined = {int(uid) for uid in bot.quarantined_users.get(key, {})}
+    game_channels = {channel_id for channel_id, game in bot.active_games.items() if game.guild.id == int(guild_id)}
+    if quarantined or game_channels:
+        bot.guild_interest[int(guild_id)] = GuildInterest(quarantined, game_channels)
+    else:
+        bot.guild_interest.pop(int(guild_id), None)
+
+def rebuild_message_interest():
+    """Rebuild the AFK set and every guild's interest entry from scratch"""
+    bot.afk_ids = {int(uid) for uid in bot.afk_users}
+    bot.guild_interest = {}
+    for guild_id in set(bot.quarantined_users) | {str(game.guild.id) for game in bot.active_games.values()}:
+        refresh_guild_interest(guild_id)
+
+# ===== RATE LIMITING =====
+RATE_LIMIT_IDLE = 600   # seconds before an untouched bucket is forgotten (longer than any refill)
+
+# name -> ((uses, per seconds) for each user, (uses, per seconds) for each channel)
+RATE_LIMITS = {
+    "daily": ((2, 10), (20, 10)),
+    "work": ((2, 10), (20, 10)),
+    "gamble": ((3, 10), (15, 10)),
+    "coinflip": ((3, 10), (15, 10)),
+    "deposit": ((5, 10), (30, 10)),
+    "withdraw": ((5, 10), (30, 10)),
+    "transfer": ((3, 10), (20, 10)),
+    "buy": ((3, 10), (20, 10)),
+    "collectprofit": ((3, 10), (20, 10)),
+    "rich": ((2, 15), (5, 15)),
+    "countryleaderboard": ((2, 15), (5, 15)),
+    "guess": ((3, 5), (20, 5)),   # correct country game answers
+}
+
+class RateLimiter:
+    """Per-user and per-channel token buckets, refilled lazily and evicted once idle"""
+
+    def __init__(self, limits, idle):
+        # name -> ((burst, tokens per second) per user, (burst, tokens per second) per channel)
+        self.limits = {
+            name: tuple((uses, uses / per) for uses, per in scopes)
+            for name, scopes in limits.items()
+        }
+        self.idle = idle
+        self.buckets = {}    # (name, scope, id) -> (tokens, last hit, warned), oldest hit first
+
+    def hit(self, name, user_id, channel_id):
+        """Take a token from both buckets; returns None, or (retry_after, notify) when throttled"""
+        limits = self.limits.get(name)
+        if limits is None:
+            return None
+        now = time.monotonic()
+        keys = ((name, 0, user_id), (name, 1, channel_id))
+        levels = []
+        for key, (burst, rate) in zip(keys, limits):
+            bucket = self.buckets.pop(key, None)
+            if bucket is None:
+                levels.append((burst, False))
+            else:
+                levels.append((min(burst, bucket[0] + (now - bucket[1]) * rate), bucket[2]))
+
+        retry_after = max((1 - tokens) / rate for (tokens, _), (_, rate) in zip(levels, limits))
+        notify = False
+        for key, (tokens, warned) in zip(keys, levels):
+            if retry_after <= 0:
+                self.buckets[key] = (tokens - 1, now, False)
+            elif tokens < 1:
+                # Only the first throttled hit of a streak gets a reply
+                notify = notify or not warned
+                self.buckets[key] = (tokens, now, True)
+            else:
+                self.buckets[key] = (tokens, now, warned)
+        self.evict_idle(now)
+        return None if retry_after <= 0 else (retry_after, notify)
+
+    def evict_idle(self, now):
+        """Drop buckets untouched for longer than `idle`; they would be full again anyway"""
+        buckets = self.buckets
+        while buckets:
+            oldest = next(iter(buckets))
+            if now - buckets[oldest][1] < self.idle:
+                break
+            del buckets[oldest]
+
+# ===== COMMAND DISPATCH =====
+UNKNOWN_COMMAND_COOLDOWN = 30   # seconds between "command not found" replies per channel
+
+def build_command_map():
+    """Freeze every command name and alias once all commands are registered"""
+    return MappingProxyType(dict(bot.all_commands))
+
+async def dispatch_command(message):
+    """Only build a Context for prefixed messages that name a known command"""
+    content = message.content
+    if not content.startswith(COMMAND_PREFIX):
+        return
+    words = content[len(COMMAND_PREFIX):].split(None, 1)
+    if not words:
+        return
+    command = bot.command_map.get(words[0])
+    if command is None:
+        return await send_unknown_command(message.channel)
+    if not bot.economy_ready.is_set():
+        await bot.economy_ready.wait()
+
+    throttled = bot.rate_limiter.hit(command.name, message.author.id, message.channel.id)
+    if throttled:
+        retry_after, notify = throttled
+        if notify:
+            try:
+                await message.channel.send(
+                    f"⏳ {message.author.mention}, slow down! Try `{COMMAND_PREFIX}{command.name}` again in {retry_after:.1f}s.",
+                    delete_after=5
+                )
+            except:
+                pass
+        return
+    await bot.process_commands(message)
+
+async def send_unknown_command(channel):
+    """Reply to an unknown command at most once per channel per cooldown"""
+    now = time.monotonic()
+    replies = bot.unknown_command_replies
+    if now - replies.get(channel.id, -UNKNOWN_COMMAND_COOLDOWN) < UNKNOWN_COMMAND_COOLDOWN:
+        return
+    # Re-insert so the dict stays ordered oldest-first, then drop expired channels
+    replies.pop(channel.id, None)
+    replies[channel.id] = now
+    while replies:
+        oldest = next(iter(replies))
+        if now - replies[oldest] < UNKNOWN_COMMAND_COOLDOWN:
+            break
+        del replies[oldest]
+
+    embed = create_embed(
+        "❌ Command Not Found",
+        f"Command not found! Use `{COMMAND_PREFIX}help` to see all commands.",
+        discord.Color.red()
+    )
+    try:
+        await channel.send(embed=embed, delete_after=10)
+    except:
+        pass
+
+# ===== COUNTRY CATALOG =====
+# Other accepted spellings, keyed by the normalized official name
+ANSWER_ALIASES = {
+    "united kingdom": ("uk", "great britain", "britain"),
+    "united states": ("usa", "us", "america", "united states of america"),
+    "south korea": ("korea", "republic of korea"),
+    "netherlands": ("holland", "the netherlands"),
+    "philippines": ("the philippines",),
+    "bahamas": ("the bahamas",),
+    "micronesia": ("federated states of micronesia",),
+    "turkey": ("turkiye",),
+    "washington dc": ("washington",),
+    "new delhi": ("delhi",),
+    "mexico city": ("ciudad de mexico",),
+}
+
+ANSWER_PUNCTUATION = str.maketrans({".": "", "'": "", "’": "", "&": " and "})
+
+def normalize_answer(text):
+    """Casefold, strip accents and collapse punctuation/whitespace so spellings compare equal"""
+    text = unicodedata.normalize("NFKD", text.casefold().translate(ANSWER_PUNCTUATION))
+    text = "".join(ch if ch.isalnum() else " " for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split())
+
+def answer_forms(name):
+    """The normalized name plus its known aliases"""
+    key = normalize_answer(name)
+    return {key, *(normalize_answer(alias) for alias in ANSWER_ALIASES.get(key, ()))}
+
+Country = namedtuple("Country", ("name", "capital", "flag", "continent", "flag_answers", "capital_answers"))
+
+class CountryCatalog:
+    """countries.json compiled once into Country tuples, with each continent a range of indices"""
+
+    def __init__(self, countries):
+        entries = []
+        self.continents = {}     # continent -> tuple of indices into self.countries
+        for continent, listed in countries.items():
+            start = len(entries)
+            for country in listed:
+                capital = frozenset(answer_forms(country["capital"]))
+                entries.append(Country(
+                    country["country"], country["capital"], country.get("flag", "🏳️"), continent,
+                    capital | answer_forms(country["country"]), capital,
+                ))
+            if len(entries) > start:
+                self.continents[continent] = tuple(range(start, len(entries)))
+        self.countries = tuple(entries)
+        self.by_key = {continent.casefold(): continent for continent in self.continents}
+
+    def parse_pool(self, spec):
+        """Parse "Europe", "All", "Europe,Asia" or "Europe:2,Asia" into ((continent, weight), ...)
+
+        Returns None if a continent is unknown, a weight isn't a positive integer or the
+        pool has no countries (only continents with countries are in self.continents).
+        """
+        if spec.casefold() == "all":
+            return tuple((continent, 1) for continent in self.continents) or None
+        pool = {}
+        for part in spec.split(","):
+            name, _, weight = part.partition(":")
+            continent = self.by_key.get(name.strip().casefold())
+            try:
+                weight = int(weight) if weight.strip() else 1
+            except ValueError:
+                return None
+            if continent is None or weight < 1:
+                return None
+            pool[continent] = weight
+        return tuple(pool.items()) if pool else None
+
+class ShuffleBag:
+    """Deals a pool's countries from shuffled decks, so nothing repeats until a deck runs out
+
+    Equal weights share one deck; otherwise each continent keeps its own deck and a draw
+    first picks a continent in proportion to weight times size.
+    """
+
+    __slots__ = ("catalog", "sources", "decks", "cum_weights", "last")
+
+    def __init__(self, catalog, pool):
+        self.catalog = catalog
+        if len({weight for _, weight in pool}) == 1:
+            self.sources = (tuple(i for continent, _ in pool for i in catalog.continents[continent]),)
+            self.cum_weights = None
+        else:
+            self.sources = tuple(catalog.continents[continent] for continent, _ in pool)
+            self.cum_weights = []
+            total = 0
+            for (_, weight), source in zip(pool, self.sources):
+                total += weight * len(source)
+                self.cum_weights.append(total)
+        if not self.sources or not all(self.sources):
+            raise ValueError("country pool has no countries")
+        self.decks = [[] for _ in self.sources]
+        self.last = None
+
+    def draw(self):
+        """Next Country from the bag, refilling and reshuffling an empty deck"""
+        if self.cum_weights is None:
+            slot = 0
+        else:
+            slot = bisect.bisect_right(self.cum_weights, random.random() * self.cum_weights[-1])
+        deck = self.decks[slot]
+        if not deck:
+            deck.extend(self.sources[slot])
+            random.shuffle(deck)
+            # Don't let a fresh deck open with the card the last one ended on
+            if len(deck) > 1 and deck[-1] == self.last:
+                deck[0], deck[-1] = deck[-1], deck[0]
+        self.last = deck.pop()
+        return self.catalog.countries[self.last]
+
+COUNTRY_BAG_CACHE_SIZE = 256   # shuffle bags kept; least recently used are dropped
+
+def country_bag(channel_id, pool):
+    """The channel's shuffle bag for `pool`, kept across games so decks carry on"""
+    key = (channel_id, pool)
+    bags = bot.country_bags
+    bag = bags.get(key)
+    if bag is None:
+        bag = bags[key] = ShuffleBag(bot.country_catalog, pool)
+        while len(bags) > COUNTRY_BAG_CACHE_SIZE:
+            bags.popitem(last=False)
+    else:
+        bags.move_to_end(key)
+    return bag
+
+# ===== COUNTRY LEADERBOARDS =====
+LEADERBOARD_SIZE = 10
+
+class ScoreBoard:
+    """One leaderboard's scores plus a min-heap of its top entries
+
+    Scores only ever grow, so a player outside the heap can only enter it by beating
+    its smallest entry; reading the leaderboard never touches the full score dict.
+    """
+
+    __slots__ = ("scores", "top", "size", "season", "started_at")
+
+    def __init__(self, scores=None, size=LEADERBOARD_SIZE, season=None, started_at=None):
+        self.scores = scores if scores is not None else {}    # user_id (str) -> score
+        self.size = size
+        self.season = season
+        self.started_at = started_at
+        self.top = heapq.nlargest(size, ((score, uid) for uid, score in self.scores.items()))
+        heapq.heapify(self.top)
+
+    def add(self, user_id, points):
+        """Add points to a player and keep the heap in step"""
+        score = self.scores.get(user_id, 0) + points
+        self.scores[user_id] = score
+        top = self.top
+        for i, (_, member) in enumerate(top):
+            if member == user_id:
+                top[i] = (score, user_id)
+                heapq.heapify(top)
+                return score
+        if len(top) < self.size:
+            heapq.heappush(top, (score, user_id))
+        elif score > top[0][0]:
+            heapq.heapreplace(top, (score, user_id))
+        return score
+
+    def leaders(self):
+        """[(user_id, score)] best first"""
+        return [(uid, score) for score, uid in sorted(self.top, key=lambda e: (-e[0], e[1]))]
+
+def boards_from_seasons(seasons):
+    """{guild_id: ScoreBoard} for each guild's current season, from the JSON/database layout"""
+    return {
+        int(guild_id): ScoreBoard(info.get("scores", {}), season=info["season"], started_at=info.get("started_at"))
+        for guild_id, info in seasons.items()
+    }
+
+def season_board(guild_id):
+    """The guild's current season board, opening season 1 on first use"""
+    board = bot.season_boards.get(guild_id)
+    if board is None:
+        board = bot.season_boards[guild_id] = ScoreBoard(season=1, started_at=datetime.datetime.now().isoformat())
+        save_country_seasons()
+    return board
+
+def start_new_season(guild_id):
+    """Point the guild at a fresh, empty season; the old board is left as it was"""
+    old = season_board(guild_id)
+    bot.season_boards[guild_id] = ScoreBoard(season=old.season + 1, started_at=datetime.datetime.now().isoformat())
+    save_country_seasons()
+    return old
 
 print("📊 Loading data...")
 
 # Load initial data from JSON
 data = load_data()
-economy = load_economy()
 shop_items = load_shop()
 role_salaries = load_role_salaries()
 countries = load_countries()
 country_scores = load_country_scores()
+country_seasons = load_country_seasons()
 quarantine_data = load_quarantine()
 business_data = load_businesses()
 last_salary_data = load_last_salary()
-last_business_profit_data = load_last_business_profit()
 simple_business_data = load_simple_businesses()       # NEW
 
 if 'RAILWAY_ENVIRONMENT' in os.environ:
@@ -534,23 +2316,38 @@ if 'RAILWAY_ENVIRONMENT' in os.environ:
 bot.afk_users = data.get("afk_users", {})
 bot.warnings = data.get("warnings", {})
 bot.muted_users = data.get("muted_users", {})
-bot.wallets = economy.get("wallets", {})
-bot.banks = economy.get("banks", {})
-bot.last_daily = economy.get("last_daily", {})
-bot.last_work = economy.get("last_work", {})
-bot.owned_items = economy.get("owned_items", {})
-bot.businesses = economy.get("businesses", {})
+bot.mute_roles = {}          # guild_id -> Muted role id
+bot.mutes = MuteScheduler()
+bot.economy = EconomyStore()                # filled in by load_economy_store() in on_ready
+bot.economy_ready = asyncio.Event()
+bot.startup_loaded = False                 # set by the first on_ready
+bot.names = NameResolver(NAME_CACHE_TTL, NAME_CACHE_SIZE)
+bot.journal_seq = 0
+bot.journal_compacted_seq = 0
+bot.journal_file = None
+bot.journal_flush_scheduled = False
 bot.shop_items = shop_items
-bot.role_salaries = role_salaries
+bot.role_salaries_legacy = set_role_salaries(role_salaries)
+bot.payroll_date, bot.payroll_paid = read_payroll_ledger()
+bot.scheduler = JobScheduler()
 bot.countries = countries
-bot.country_scores = country_scores
+bot.country_catalog = CountryCatalog(countries)
+bot.country_bags = OrderedDict()           # (channel_id, pool) -> ShuffleBag, LRU order
+bot.country_board = ScoreBoard(country_scores)         # all-time, every guild
+bot.season_boards = boards_from_seasons(country_seasons)  # guild_id -> current season's ScoreBoard
+bot.score_deltas = {}                      # user_id -> points not yet added in the database
+bot.season_deltas = {}                     # (guild_id, season, user_id) -> points not yet added
 bot.quarantined_users = quarantine_data.get("quarantined_users", {})
 bot.quarantine_channels = quarantine_data.get("quarantine_channels", {})
 bot.business_types = business_data.get("business_types", {})
-bot.active_games = {}
+bot.active_games = {}                      # channel_id -> CountryGame
+bot.command_map = MappingProxyType({})     # filled in once every command is registered
+bot.unknown_command_replies = {}           # channel_id -> monotonic time of last reply
+bot.rate_limiter = RateLimiter(RATE_LIMITS, RATE_LIMIT_IDLE)
 bot.start_time = datetime.datetime.now()
 bot.active_lawsuits = {}               # NEW
 bot.simple_businesses = simple_business_data   # NEW
+rebuild_message_interest()
 
 print("✅ Data loaded successfully!") 
 # ===== HTTP KEEP-ALIVE SERVER =====
@@ -577,6 +2374,38 @@ def start_web_server():
 threading.Thread(target=start_web_server, daemon=True).start() 
 # ===== BOT EVENTS =====
 
+async def load_economy_store(connected):
+    """
+    Load the economy once per process. When Supabase already holds it,
+    accounts load on demand and economy_data.json is never parsed; the
+    JSON snapshot is only read for the fallback or to migrate an empty
+    database.
+    """
+    if connected and await db.has_economy():
+        bot.economy.attach(db, ECONOMY_CACHE_SIZE)
+        committed = await db.load_journal_seq()
+        if committed is None:
+            # Written before the database tracked its journal seq; it already holds what it has
+            economy = await asyncio.to_thread(load_economy)
+            committed = economy["journal_seq"]
+        bot.economy.committed_seq = committed
+        bot.journal_seq = bot.journal_compacted_seq = committed
+        replayed = await replay_journal_into_store(committed)
+        if replayed:
+            await economy_writer.flush_now()
+            print(f"📒 Replayed {replayed} uncommitted economy journal entries into Supabase")
+        print("✅ Economy accounts will be loaded on demand from Supabase.")
+    else:
+        economy = await asyncio.to_thread(load_economy)
+        bot.economy = EconomyStore(accounts_from_economy(economy))
+        bot.journal_seq = bot.journal_compacted_seq = economy["journal_seq"]
+        if connected:
+            print("ℹ️ No economy data in Supabase yet – migrating JSON.")
+            bot.economy.mark_all_dirty()
+            bot.economy.attach(db, ECONOMY_CACHE_SIZE, keep_loaded=True)
+            economy_writer.request()
+    bot.economy_ready.set()
+
 @bot.event
 async def on_ready():
     """When bot connects successfully"""
@@ -585,44 +2414,68 @@ async def on_ready():
     print(f'🔗 Connected to {len(bot.guilds)} servers')
     print(f'🏢 Host: Render')
 
-    if await db.connect():
-        wallets, banks, last_daily, last_work, owned_items, businesses = await db.load_economy()
-        if wallets:
-            bot.wallets = wallets
-            bot.banks = banks
-            bot.last_daily = last_daily
-            bot.last_work = last_work
-            bot.owned_items = owned_items
-            bot.businesses = businesses
-            print("✅ Loaded economy data from Supabase.")
-        else:
-            print("ℹ️ No economy data in Supabase yet – using JSON.")
-
-        warnings = await db.load_warnings()
-        if warnings:
-            bot.warnings = warnings
-            print("✅ Loaded warnings from Supabase.")
-
-        quarantined, channels = await db.load_quarantine()
-        if quarantined:
-            bot.quarantined_users = quarantined
-            bot.quarantine_channels = channels
-            print("✅ Loaded quarantine data from Supabase.")
-
-        scores = await db.load_country_scores()
-        if scores:
-            bot.country_scores = scores
-            print("✅ Loaded country scores from Supabase.")
-
-        shop_items_db = await db.load_shop_items()
-        if shop_items_db:
-            bot.shop_items = shop_items_db
-            print("✅ Loaded shop items from Supabase.")
-
-        role_salaries_db = await db.load_role_salaries()
-        if role_salaries_db:
-            bot.role_salaries = role_salaries_db
-            print("✅ Loaded role salaries from Supabase.")
+    # on_ready fires again after every gateway reconnect; connecting, loading
+    # and seeding the database must only happen once or seeded scores double
+    if not bot.startup_loaded:
+        bot.startup_loaded = True
+        connected = await db.connect()
+        await load_economy_store(connected)
+
+        if connected:
+            warnings = await db.load_warnings()
+            if warnings:
+                bot.warnings = warnings
+                print("✅ Loaded warnings from Supabase.")
+
+            quarantined, channels = await db.load_quarantine()
+            if quarantined:
+                bot.quarantined_users = quarantined
+                bot.quarantine_channels = channels
+                rebuild_message_interest()
+                print("✅ Loaded quarantine data from Supabase.")
+
+            scores = await db.load_country_scores()
+            if scores:
+                bot.country_board = ScoreBoard(scores)
+                print("✅ Loaded country scores from Supabase.")
+            elif bot.country_board.scores:
+                # Empty table: seed it from the JSON scores so later deltas add to the right totals
+                for uid, score in bot.country_board.scores.items():
+                    bot.score_deltas[uid] = bot.score_deltas.get(uid, 0) + score
+                scores_writer.request()
+
+            seasons = await db.load_country_seasons()
+            if seasons:
+                bot.season_boards = boards_from_seasons(seasons)
+                print("✅ Loaded country seasons from Supabase.")
+            elif bot.season_boards:
+                for guild_id, board in bot.season_boards.items():
+                    for uid, score in board.scores.items():
+                        key = (guild_id, board.season, uid)
+                        bot.season_deltas[key] = bot.season_deltas.get(key, 0) + score
+                save_country_seasons()
+                scores_writer.request()
+
+            shop_items_db = await db.load_shop_items()
+            if shop_items_db:
+                bot.shop_items = shop_items_db
+                print("✅ Loaded shop items from Supabase.")
+
+            merge_payroll_ledger(*await db.load_payroll_ledger())
+
+            if bot.scheduler.task is None:
+                bot.scheduler.restore(await db.load_jobs())
+
+            role_salaries_db = await db.load_role_salaries()
+            if role_salaries_db:
+                if set_role_salaries(role_salaries_db):
+                    bot.role_salaries_legacy = True
+                print("✅ Loaded role salaries from Supabase.")
+
+    if match_salary_role_names(bot.guilds) or bot.role_salaries_legacy:
+        bot.role_salaries_legacy = False
+        save_role_salaries()
+        print("✅ Migrated role salaries to role IDs.")
 
     await bot.change_presence(
         activity=discord.Activity(
@@ -631,17 +2484,13 @@ async def on_ready():
         )
     )
 
-    if not daily_salaries.is_running():
-        daily_salaries.start()
-        print("💰 Daily salaries task started")
-
-    if not check_muted_users.is_running():
-        check_muted_users.start()
-        print("🔇 Mute check task started")
+    if bot.scheduler.task is None:
+        bot.scheduler.start()
+        print("⏰ Job scheduler started (daily salaries)")
 
-    if not business_profits.is_running():
-        business_profits.start()
-        print("🏢 Business profits task started")
+    if bot.mutes.task is None:
+        bot.mutes.start()
+        print(f"🔇 Mute expiry scheduler started ({len(bot.mutes.heap)} active mutes)")
 
     print("🎉 Bot is ready and running 24/7!")
 
@@ -673,14 +2522,20 @@ async def on_member_join(member):
 async def on_message(message):
     """Handle all messages"""
     if message.author.bot:
-        return await bot.process_commands(message)
+        return
 
-    user_id = str(message.author.id)
-    guild_id = str(message.guild.id)
+    # Fast path: ordinary chat from a user who isn't AFK, in a guild with nothing to watch
+    author_id = message.author.id
+    interest = bot.guild_interest.get(message.guild.id) if message.guild else None
+    if interest is None and author_id not in bot.afk_ids:
+        return await dispatch_command(message)
+
+    user_id = str(author_id)
 
     # AFK system
-    if user_id in bot.afk_users and not message.content.startswith('!'):
-        info = bot.afk_users.pop(user_id)
+    if author_id in bot.afk_ids and not message.content.startswith(COMMAND_PREFIX):
+        bot.afk_ids.discard(author_id)
+        info = bot.afk_users.pop(user_id, None)
         try:
             time_afk = (datetime.datetime.now() - datetime.datetime.fromisoformat(info["time"])).seconds // 60
             await message.channel.send(
@@ -688,12 +2543,16 @@ async def on_message(message):
                 delete_after=5
             )
             save_data()
-            asyncio.create_task(async_save_warnings())
+            warnings_writer.request()
         except:
             pass
 
+    if interest is None:
+        return await dispatch_command(message)
+    guild_id = str(message.guild.id)
+
     # Check if user is quarantined
-    if guild_id in bot.quarantined_users and user_id in bot.quarantined_users[guild_id]:
+    if author_id in interest.quarantined:
         quarantine_info = bot.quarantined_users[guild_id][user_id]
         quarantine_channel_id = quarantine_info.get("channel_id")
 
@@ -706,148 +2565,214 @@ async def on_message(message):
             return
 
     # Country game handling
-    if guild_id in bot.active_games and bot.active_games[guild_id].get("active", False):
-        game = bot.active_games[guild_id]
-        if "current_country" not in game or game.get("paused", False):
-            return await bot.process_commands(message)
-
-        if not message.content.startswith('!'):
-            await handle_country_guess(message, game, user_id)
+    if message.channel.id in interest.game_channels:
+        game = bot.active_games[message.channel.id]
+        if not game.accepting:
+            return await dispatch_command(message)
+
+        if not message.content.startswith(COMMAND_PREFIX):
+            # Wrong guesses cost one set lookup, so only correct claims are throttled;
+            # flooded claims are dropped silently, replying would cost more than the claim
+            if (normalize_answer(message.content) in game.answers
+                    and not bot.rate_limiter.hit("guess", author_id, message.channel.id)):
+                await handle_country_guess(message, game, user_id)
             return
 
-    await bot.process_commands(message) 
-# ===== COUNTRY GAME FUNCTIONS =====
+    await dispatch_command(message)
 
-async def handle_country_guess(message, game, user_id):
-    """Handle country game guesses"""
-    country = game["current_country"]
-    guess = message.content.strip().lower()
-    game_type = game.get("game_type", "flag")
+# ===== COUNTRY GAME FUNCTIONS =====
+ROUND_TIMEOUT = 60    # seconds to answer before the round is revealed
+ROUND_GRACE = 3       # seconds between a round closing and the next one opening
+ROUND_PODIUM = ((3, "🥇"), (2, "🥈"), (1, "🥉"))   # points and medal per finishing position
 
-    correct = False
+class CountryGame:
+    """One channel's country game, a state machine that owns a single timer task
 
-    if game_type == "flag":
-        if guess in [country["country"].lower(), country["capital"].lower()]:
-            correct = True
-    else:
-        if guess == country["capital"].lower():
-            correct = True
+    asking -> closing (first correct answer) or revealing (timeout) -> asking ... -> finished
+    Round transitions run under `lock`; guesses only claim a podium place and never sleep.
+    """
 
-    if correct:
-        if "winners" not in game:
-            game["winners"] = []
+    ASKING, CLOSING, REVEALING, PAUSED, FINISHED = "asking", "closing", "revealing", "paused", "finished"
+
+    def __init__(self, guild, channel_id, game_type, pool, rounds):
+        self.guild = guild
+        self.channel_id = channel_id
+        self.game_type = game_type
+        self.bag = country_bag(channel_id, pool)
+        self.rounds = rounds            # -1 plays forever
+        self.round_count = 0
+        self.state = self.PAUSED
+        self.country = None
+        self.answers = frozenset()
+        self.winners = []
+        self.lock = asyncio.Lock()
+        self.timer = None
+
+    @property
+    def accepting(self):
+        """Whether chat in the game channel should be read as guesses"""
+        return self.state in (self.ASKING, self.CLOSING)
+
+    @property
+    def paused(self):
+        return self.state == self.PAUSED
+
+    def _set_timer(self, delay, transition):
+        """Replace the game's timer with one that runs `transition` after `delay` seconds"""
+        self._cancel_timer()
+        self.timer = asyncio.create_task(self._fire(delay, transition))
+
+    def _cancel_timer(self):
+        if self.timer is not None and self.timer is not asyncio.current_task():
+            self.timer.cancel()
+        self.timer = None
+
+    async def _fire(self, delay, transition):
+        await asyncio.sleep(delay)
+        async with self.lock:
+            # A transition that ran while we waited may already have replaced this timer
+            if self.timer is not asyncio.current_task():
+                return
+            self.timer = None
+            await transition()
+
+    async def start(self):
+        async with self.lock:
+            await self._next_round()
+
+    async def pause(self):
+        async with self.lock:
+            self._cancel_timer()
+            self.state = self.PAUSED
+
+    async def resume(self):
+        """Resume a paused game with a fresh round; returns False if it wasn't paused"""
+        async with self.lock:
+            if self.state != self.PAUSED:
+                return False
+            await self._next_round()
+            return True
 
-        if user_id in game["winners"]:
+    async def stop(self):
+        async with self.lock:
+            self._end()
+
+    def claim(self, user_id):
+        """Record a correct answer; returns the podium position, or 0 if it earns nothing"""
+        if not self.accepting or user_id in self.winners or len(self.winners) >= len(ROUND_PODIUM):
+            return 0
+        self.winners.append(user_id)
+        if self.state == self.ASKING:
+            self.state = self.CLOSING
+            self._set_timer(ROUND_GRACE, self._next_round)
+        return len(self.winners)
+
+    def _end(self):
+        """Cancel the timer and drop the game from its channel"""
+        flush_country_scores()
+        self._cancel_timer()
+        self.state = self.FINISHED
+        if bot.active_games.get(self.channel_id) is self:
+            del bot.active_games[self.channel_id]
+            refresh_guild_interest(self.guild.id)
+
+    async def _next_round(self):
+        """Open the next round, or finish once the round limit is reached"""
+        flush_country_scores()
+        channel = self.guild.get_channel(self.channel_id)
+        if self.rounds != -1 and self.round_count >= self.rounds:
+            self._end()
+            if channel:
+                embed = create_embed(
+                    "🏁 Game Over",
+                    f"The game has finished after **{self.rounds}** rounds!\n"
+                    f"Use `!startcountrygame` to play again.",
+                    discord.Color.green()
+                )
+                await channel.send(embed=embed)
+            return
+        if not channel:
+            self._end()
             return
 
-        game["winners"].append(user_id)
-        position = len(game["winners"])
-
-        if position == 1:
-            points = 3
-            medal = "🥇"
-        elif position == 2:
-            points = 2
-            medal = "🥈"
-        elif position == 3:
-            points = 1
-            medal = "🥉"
-        else:
-            points = 0
-            medal = "🎯"
-
-        bot.country_scores[user_id] = bot.country_scores.get(user_id, 0) + points
-        save_country_scores()
-        asyncio.create_task(async_save_country_scores())
+        country = self.bag.draw()
+        self.country = country
+        self.answers = country.flag_answers if self.game_type == "flag" else country.capital_answers
+        self.winners = []
+        self.round_count += 1
+        self.state = self.ASKING
+        self._set_timer(ROUND_TIMEOUT, self._reveal)
 
-        if game_type == "flag":
-            title = f"{medal} Correct! {country['flag']}"
-            answer_info = f"**Country:** {country['country']}\n**Capital:** {country['capital']}"
+        if self.game_type == "flag":
+            embed = create_embed(
+                f"🇺🇳 Round {self.round_count} Started!",
+                f"**Guess the country or capital!**\n"
+                f"**Flag:** {country.flag}",
+                discord.Color.blue()
+            )
         else:
-            title = f"{medal} Correct!"
-            answer_info = f"**Capital of {country['country']}:** {country['capital']}"
-
-        embed = create_embed(
-            title,
-            f"**{message.author.mention} guessed {position}{'st' if position==1 else 'nd' if position==2 else 'rd' if position==3 else 'th'}!**\n"
-            f"{answer_info}\n"
-            f"**Points:** +{points}",
-            discord.Color.green() if position <= 3 else discord.Color.blue()
-        )
-        await message.channel.send(embed=embed)
-
-        if "timer" in game and not game["timer"].done():
-            game["timer"].cancel()
-
-        await asyncio.sleep(3)
-        await next_country_round(message.guild)
-
-async def next_country_round(guild):
-    """Start next round of country game, check round limit"""
-    guild_id = str(guild.id)
-    if guild_id not in bot.active_games:
-        return
-
-    game = bot.active_games[guild_id]
+            embed = create_embed(
+                f"🏛️ Round {self.round_count} Started!",
+                f"**What is the capital of:** {country.name}?",
+                discord.Color.blue()
+            )
+        await channel.send(embed=embed)
 
-    if game["rounds"] != -1 and game["round_count"] >= game["rounds"]:
-        channel = guild.get_channel(game["channel_id"])
+    async def _reveal(self):
+        """Nobody answered in time: show the answer, then move on"""
+        self.state = self.REVEALING
+        self._set_timer(ROUND_GRACE, self._next_round)
+        channel = self.guild.get_channel(self.channel_id)
         if channel:
             embed = create_embed(
-                "🏁 Game Over",
-                f"The game has finished after **{game['rounds']}** rounds!\n"
-                f"Use `!startcountrygame` to play again.",
-                discord.Color.green()
+                "⏰ Time's Up!",
+                f"**Correct answer:** {self.country.name} - {self.country.capital}",
+                discord.Color.orange()
             )
             await channel.send(embed=embed)
-        del bot.active_games[guild_id]
-        return
-
-    continent = game["continent"]
-    countries = bot.countries.get(continent, [])
-    if not countries:
-        return
 
-    country = random.choice(countries)
-    game["current_country"] = country
-    game["winners"] = []
-    game["round_count"] += 1
+def add_country_score(guild_id, user_id, points):
+    """Credit points all-time and for the guild's season, buffering the deltas for the next flush"""
+    bot.country_board.add(user_id, points)
+    board = season_board(guild_id)
+    board.add(user_id, points)
+    bot.score_deltas[user_id] = bot.score_deltas.get(user_id, 0) + points
+    key = (guild_id, board.season, user_id)
+    bot.season_deltas[key] = bot.season_deltas.get(key, 0) + points
+    save_country_scores()
+    scores_writer.request()
+
+def flush_country_scores():
+    """Write a finished round's scores now rather than waiting out the save delay"""
+    for writer in (scores_writer, scores_file_writer, seasons_file_writer):
+        writer.flush_soon()
 
-    channel = guild.get_channel(game["channel_id"])
-    if not channel:
+async def handle_country_guess(message, game, user_id):
+    """Handle a correct country game guess"""
+    position = game.claim(user_id)
+    if not position:
         return
 
-    if game["game_type"] == "flag":
-        flag_display = country.get('flag', '🏳️')
-        embed = create_embed(
-            f"🇺🇳 Round {game['round_count']} Started!",
-            f"**Guess the country or capital!**\n"
-            f"**Flag:** {flag_display}",
-            discord.Color.blue()
-        )
-    else:
-        embed = create_embed(
-            f"🏛️ Round {game['round_count']} Started!",
-            f"**What is the capital of:** {country['country']}?",
-            discord.Color.blue()
-        )
+    country = game.country
+    points, medal = ROUND_PODIUM[position - 1]
+    add_country_score(game.guild.id, user_id, points)
 
-    await channel.send(embed=embed)
+    if game.game_type == "flag":
+        title = f"{medal} Correct! {country.flag}"
+        answer_info = f"**Country:** {country.name}\n**Capital:** {country.capital}"
+    else:
+        title = f"{medal} Correct!"
+        answer_info = f"**Capital of {country.name}:** {country.capital}"
 
-    async def timeout():
-        await asyncio.sleep(60)
-        if guild_id in bot.active_games and "winners" in bot.active_games[guild_id]:
-            if len(bot.active_games[guild_id]["winners"]) == 0:
-                embed = create_embed(
-                    "⏰ Time's Up!",
-                    f"**Correct answer:** {country['country']} - {country['capital']}",
-                    discord.Color.orange()
-                )
-                await channel.send(embed=embed)
-                await asyncio.sleep(3)
-                await next_country_round(guild)
+    embed = create_embed(
+        title,
+        f"**{message.author.mention} guessed {position}{'st' if position==1 else 'nd' if position==2 else 'rd'}!**\n"
+        f"{answer_info}\n"
+        f"**Points:** +{points}",
+        discord.Color.green()
+    )
+    await message.channel.send(embed=embed)
 
-    game["timer"] = asyncio.create_task(timeout()) 
 # ===== BASIC COMMANDS =====
 
 @bot.command(name="ping")
@@ -869,6 +2794,7 @@ async def afk(ctx, *, reason="No reason"):
         "reason": reason,
         "time": datetime.datetime.now().isoformat()
     }
+    bot.afk_ids.add(ctx.author.id)
     save_data()
     embed = create_embed(
         "⏸️ AFK Set",
@@ -886,7 +2812,7 @@ async def mute(ctx, member: discord.Member, minutes: int = 10, *, reason="No rea
         await ctx.send(embed=embed)
         return
 
-    mute_role = discord.utils.get(ctx.guild.roles, name="Muted")
+    mute_role = get_mute_role(ctx.guild)
     if not mute_role:
         try:
             mute_role = await ctx.guild.create_role(
@@ -894,6 +2820,7 @@ async def mute(ctx, member: discord.Member, minutes: int = 10, *, reason="No rea
                 color=discord.Color.dark_gray(),
                 reason="Mute role for bot"
             )
+            bot.mute_roles[ctx.guild.id] = mute_role.id
             for channel in ctx.guild.channels:
                 try:
                     await channel.set_permissions(mute_role,
@@ -913,8 +2840,10 @@ async def mute(ctx, member: discord.Member, minutes: int = 10, *, reason="No rea
     bot.muted_users[str(member.id)] = {
         "unmute_at": unmute_time.isoformat(),
         "reason": reason,
-        "guild_id": ctx.guild.id
+        "guild_id": ctx.guild.id,
+        "channel_id": ctx.channel.id
     }
+    bot.mutes.schedule(str(member.id), unmute_time.isoformat())
     save_data()
 
     embed = create_embed(
@@ -927,25 +2856,11 @@ async def mute(ctx, member: discord.Member, minutes: int = 10, *, reason="No rea
     )
     await ctx.send(embed=embed)
 
-    async def auto_unmute():
-        await asyncio.sleep(minutes * 60)
-        if str(member.id) in bot.muted_users:
-            try:
-                if mute_role in member.roles:
-                    await member.remove_roles(mute_role)
-                    del bot.muted_users[str(member.id)]
-                    save_data()
-                    await ctx.send(f"🔊 {member.mention} has been automatically unmuted.", delete_after=10)
-            except:
-                pass
-
-    asyncio.create_task(auto_unmute())
-
 @bot.command(name="unmute")
 @commands.has_permissions(manage_messages=True)
 async def unmute(ctx, member: discord.Member):
     """Unmute a user"""
-    mute_role = discord.utils.get(ctx.guild.roles, name="Muted")
+    mute_role = get_mute_role(ctx.guild)
     if not mute_role or mute_role not in member.roles:
         embed = create_embed("❌ Error", "This user is not muted.", discord.Color.red())
         await ctx.send(embed=embed)
@@ -1049,7 +2964,7 @@ async def warn(ctx, member: discord.Member, *, reason="No reason"):
         bot.warnings[guild_id] = {}
     bot.warnings[guild_id][user_id] = bot.warnings[guild_id].get(user_id, 0) + 1
     save_data()
-    asyncio.create_task(async_save_warnings())
+    warnings_writer.request()
 
     embed = create_embed(
         "⚠️ User Warned",
@@ -1082,10 +2997,10 @@ async def warnings(ctx, member: discord.Member = None):
 async def balance(ctx, member: discord.Member = None):
     """Check your balance or another user's balance"""
     target = member or ctx.author
-    user_id = str(target.id)
+    account = await bot.economy.get(target.id)
 
-    wallet = bot.wallets.get(user_id, 0)
-    bank = bot.banks.get(user_id, 0)
+    wallet = account.wallet
+    bank = account.bank
     total = wallet + bank
 
     embed = create_embed(
@@ -1104,16 +3019,15 @@ async def balance(ctx, member: discord.Member = None):
 @bot.command(name="daily")
 async def daily(ctx):
     """Claim daily money"""
-    user_id = str(ctx.author.id)
+    account = await bot.economy.get(ctx.author.id)
 
-    last_claim = bot.last_daily.get(user_id)
-    if last_claim:
-        last_time = datetime.datetime.fromisoformat(last_claim)
-        time_since = datetime.datetime.now() - last_time
+    now = time.time()
+    if account.last_daily is not None:
+        time_left = 86400 - (now - account.last_daily)
 
-        if time_since.total_seconds() < 86400:
-            hours_left = 23 - int(time_since.seconds // 3600)
-            minutes_left = 59 - int((time_since.seconds % 3600) // 60)
+        if time_left > 0:
+            hours_left = int(time_left // 3600)
+            minutes_left = int((time_left % 3600) // 60)
 
             embed = create_embed(
                 "⏳ Daily Reward Cooldown",
@@ -1125,15 +3039,12 @@ async def daily(ctx):
             return
 
     amount = 10000
-    bot.wallets[user_id] = bot.wallets.get(user_id, 0) + amount
-    bot.last_daily[user_id] = datetime.datetime.now().isoformat()
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "daily", wallet=amount, last_daily=now)
 
     embed = create_embed(
         "💰 Daily Reward Claimed!",
         f"You claimed **{format_money(amount)}**!\n"
-        f"**New Balance:** {format_money(bot.wallets[user_id])}",
+        f"**New Balance:** {format_money(account.wallet)}",
         discord.Color.green()
     )
     await ctx.send(embed=embed)
@@ -1141,16 +3052,15 @@ async def daily(ctx):
 @bot.command(name="work")
 async def work(ctx):
     """Work to earn money (1 hour cooldown)"""
-    user_id = str(ctx.author.id)
+    account = await bot.economy.get(ctx.author.id)
 
-    last_work = bot.last_work.get(user_id)
-    if last_work:
-        last_time = datetime.datetime.fromisoformat(last_work)
-        time_since = datetime.datetime.now() - last_time
+    now = time.time()
+    if account.last_work is not None:
+        time_left = 3600 - (now - account.last_work)
 
-        if time_since.total_seconds() < 3600:
-            minutes_left = 59 - int((time_since.seconds % 3600) // 60)
-            seconds_left = 59 - (time_since.seconds % 60)
+        if time_left > 0:
+            minutes_left = int(time_left // 60)
+            seconds_left = int(time_left % 60)
 
             embed = create_embed(
                 "⏳ Work Cooldown",
@@ -1161,10 +3071,7 @@ async def work(ctx):
             return
 
     amount = random.randint(5000, 20000)
-    bot.wallets[user_id] = bot.wallets.get(user_id, 0) + amount
-    bot.last_work[user_id] = datetime.datetime.now().isoformat()
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "work", wallet=amount, last_work=now)
 
     jobs = [
         "worked at a coffee shop ☕",
@@ -1182,7 +3089,7 @@ async def work(ctx):
     embed = create_embed(
         "💼 Work Complete!",
         f"You {job} and earned **{format_money(amount)}**!\n"
-        f"**New Balance:** {format_money(bot.wallets[user_id])}",
+        f"**New Balance:** {format_money(account.wallet)}",
         discord.Color.green()
     )
     await ctx.send(embed=embed)
@@ -1190,8 +3097,8 @@ async def work(ctx):
 @bot.command(name="deposit", aliases=["dep"])
 async def deposit(ctx, amount: str):
     """Deposit money to bank"""
-    user_id = str(ctx.author.id)
-    wallet = bot.wallets.get(user_id, 0)
+    account = await bot.economy.get(ctx.author.id)
+    wallet = account.wallet
 
     if amount.lower() == "all":
         amount_num = wallet
@@ -1216,16 +3123,13 @@ async def deposit(ctx, amount: str):
         await ctx.send(embed=embed)
         return
 
-    bot.wallets[user_id] = wallet - amount_num
-    bot.banks[user_id] = bot.banks.get(user_id, 0) + amount_num
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "deposit", wallet=-amount_num, bank=amount_num)
 
     embed = create_embed(
         "🏦 Deposit Successful",
         f"Deposited **{format_money(amount_num)}** to your bank!\n"
-        f"**New Wallet:** {format_money(bot.wallets[user_id])}\n"
-        f"**New Bank:** {format_money(bot.banks[user_id])}",
+        f"**New Wallet:** {format_money(account.wallet)}\n"
+        f"**New Bank:** {format_money(account.bank)}",
         discord.Color.green()
     )
     await ctx.send(embed=embed)
@@ -1233,8 +3137,8 @@ async def deposit(ctx, amount: str):
 @bot.command(name="withdraw", aliases=["with"])
 async def withdraw(ctx, amount: str):
     """Withdraw money from bank"""
-    user_id = str(ctx.author.id)
-    bank = bot.banks.get(user_id, 0)
+    account = await bot.economy.get(ctx.author.id)
+    bank = account.bank
 
     if amount.lower() == "all":
         amount_num = bank
@@ -1259,16 +3163,13 @@ async def withdraw(ctx, amount: str):
         await ctx.send(embed=embed)
         return
 
-    bot.banks[user_id] = bank - amount_num
-    bot.wallets[user_id] = bot.wallets.get(user_id, 0) + amount_num
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "withdraw", wallet=amount_num, bank=-amount_num)
 
     embed = create_embed(
         "💵 Withdrawal Successful",
         f"Withdrew **{format_money(amount_num)}** from your bank!\n"
-        f"**New Wallet:** {format_money(bot.wallets[user_id])}\n"
-        f"**New Bank:** {format_money(bot.banks[user_id])}",
+        f"**New Wallet:** {format_money(account.wallet)}\n"
+        f"**New Bank:** {format_money(account.bank)}",
         discord.Color.green()
     )
     await ctx.send(embed=embed)
@@ -1291,10 +3192,10 @@ async def transfer(ctx, member: discord.Member, amount: int):
         await ctx.send(embed=embed)
         return
 
-    sender_id = str(ctx.author.id)
-    receiver_id = str(member.id)
+    sender = await bot.economy.get(ctx.author.id)
+    receiver = await bot.economy.get(member.id)
 
-    sender_wallet = bot.wallets.get(sender_id, 0)
+    sender_wallet = sender.wallet
     if sender_wallet < amount:
         embed = create_embed(
             "❌ Error",
@@ -1307,10 +3208,8 @@ async def transfer(ctx, member: discord.Member, amount: int):
     tax = int(amount * 0.02)
     transfer_amount = amount - tax
 
-    bot.wallets[sender_id] = sender_wallet - amount
-    bot.wallets[receiver_id] = bot.wallets.get(receiver_id, 0) + transfer_amount
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(sender, "transfer_out", wallet=-amount)
+    update_economy(receiver, "transfer_in", wallet=transfer_amount)
 
     embed = create_embed(
         "💸 Transfer Successful",
@@ -1319,7 +3218,7 @@ async def transfer(ctx, member: discord.Member, amount: int):
         f"**Amount:** {format_money(transfer_amount)}\n"
         f"**Tax (2%):** {format_money(tax)}\n"
         f"**Total Sent:** {format_money(amount)}\n\n"
-        f"**Your New Balance:** {format_money(bot.wallets[sender_id])}",
+        f"**Your New Balance:** {format_money(sender.wallet)}",
         discord.Color.green()
     )
     await ctx.send(embed=embed) 
@@ -1335,8 +3234,8 @@ async def gamble(ctx, amount: int):
         await ctx.send(embed=embed)
         return
 
-    user_id = str(ctx.author.id)
-    wallet = bot.wallets.get(user_id, 0)
+    account = await bot.economy.get(ctx.author.id)
+    wallet = account.wallet
 
     if wallet < amount:
         embed = create_embed(
@@ -1349,26 +3248,23 @@ async def gamble(ctx, amount: int):
 
     if random.random() < 0.45:
         win_amount = int(amount * 1.5)
-        bot.wallets[user_id] = wallet + win_amount
+        update_economy(account, "gamble", wallet=win_amount)
         result = f"🎰 **You won {format_money(win_amount)}!**"
         color = discord.Color.green()
         profit = win_amount - amount
         title = "🎲 Gambling Win!"
     else:
-        bot.wallets[user_id] = wallet - amount
+        update_economy(account, "gamble", wallet=-amount)
         result = f"🎰 **You lost {format_money(amount)}!**"
         color = discord.Color.red()
         profit = -amount
         title = "🎲 Gambling Loss"
 
-    save_economy()
-    asyncio.create_task(async_save_economy())
-
     embed = create_embed(
         title,
         f"{result}\n"
         f"**Profit/Loss:** {format_money(profit)}\n"
-        f"**New Balance:** {format_money(bot.wallets[user_id])}\n"
+        f"**New Balance:** {format_money(account.wallet)}\n"
         f"**Chance:** 45% to win 1.5x",
         color
     )
@@ -1405,8 +3301,8 @@ async def coinflip(ctx, choice: str, amount: int):
         await ctx.send(embed=embed)
         return
 
-    user_id = str(ctx.author.id)
-    wallet = bot.wallets.get(user_id, 0)
+    account = await bot.economy.get(ctx.author.id)
+    wallet = account.wallet
 
     if wallet < amount:
         embed = create_embed(
@@ -1436,21 +3332,18 @@ async def coinflip(ctx, choice: str, amount: int):
 
     if win:
         win_amount = amount * 2
-        bot.wallets[user_id] = wallet + win_amount
+        update_economy(account, "coinflip", wallet=win_amount)
         result_text = f"**{result_emoji} It's {coin_result}! You won {format_money(win_amount)}!**"
         color = discord.Color.green()
         profit = win_amount - amount
         title = f"🎉 {result_emoji} You Win!"
     else:
-        bot.wallets[user_id] = wallet - amount
+        update_economy(account, "coinflip", wallet=-amount)
         result_text = f"**{result_emoji} It's {coin_result}! You lost {format_money(amount)}.**"
         color = discord.Color.red()
         profit = -amount
         title = f"💸 {result_emoji} You Lose"
 
-    save_economy()
-    asyncio.create_task(async_save_economy())
-
     embed = create_embed(
         title,
         f"{result_text}\n\n"
@@ -1458,13 +3351,29 @@ async def coinflip(ctx, choice: str, amount: int):
         f"**Coin Result:** {coin_result}\n"
         f"**Bet Amount:** {format_money(amount)}\n"
         f"**Profit/Loss:** {format_money(profit)}\n"
-        f"**New Balance:** {format_money(bot.wallets[user_id])}",
+        f"**New Balance:** {format_money(account.wallet)}",
         color
     )
 
     await message.edit(embed=embed) 
 # ===== BUSINESS SYSTEM =====
 
+def settle_business(business, now):
+    """
+    Move the profit accrued since last_settled_at into pending_profit.
+    Profit accrues continuously at investment * profit_rate per day; only
+    whole dollars are settled, and the clock advances just as far as they
+    cover, so no fraction of a dollar is ever lost.
+    """
+    start = business.get("last_settled_at") or business.get("last_profit") or business.get("created_at")
+    daily_profit = business["investment"] * business["profit_rate"]
+    start = iso_to_epoch(start) if start else now
+    accrued = int(daily_profit * max(0, now - start) / 86400)
+    business["pending_profit"] = business.get("pending_profit", 0) + accrued
+    settled_until = start + accrued * 86400 / daily_profit if daily_profit > 0 else now
+    business["last_settled_at"] = epoch_to_iso(settled_until)
+    return accrued
+
 @bot.command(name="createbusiness", aliases=["startbusiness"])
 async def createbusiness(ctx, business_type: str, business_name: str, investment: int):
     """
@@ -1472,8 +3381,8 @@ async def createbusiness(ctx, business_type: str, business_name: str, investment
     Types: cafe, shop, factory, farm, tech, restaurant
     Example: !createbusiness cafe "Coffee Corner" 50000
     """
-    user_id = str(ctx.author.id)
-    wallet = bot.wallets.get(user_id, 0)
+    account = await bot.economy.get(ctx.author.id)
+    wallet = account.wallet
 
     if investment < 10000:
         embed = create_embed(
@@ -1496,7 +3405,7 @@ async def createbusiness(ctx, business_type: str, business_name: str, investment
         await ctx.send(embed=embed)
         return
 
-    if user_id in bot.businesses:
+    if account.business:
         embed = create_embed(
             "❌ Business Limit",
             "You already own a business! You can only own one business at a time.",
@@ -1535,7 +3444,7 @@ async def createbusiness(ctx, business_type: str, business_name: str, investment
         await ctx.send(embed=embed)
         return
 
-    bot.businesses[user_id] = {
+    business = {
         "name": business_name,
         "type": business_type,
         "investment": investment,
@@ -1544,12 +3453,11 @@ async def createbusiness(ctx, business_type: str, business_name: str, investment
         "last_profit": None,
         "total_profit": 0,
         "level": 1,
-        "emoji": type_info["emoji"]
+        "emoji": type_info["emoji"],
+        "last_settled_at": datetime.datetime.now().isoformat(),
+        "pending_profit": 0
     }
-
-    bot.wallets[user_id] = wallet - investment
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "create_business", wallet=-investment, businesses=business)
 
     daily_profit = int(investment * type_info["profit"])
 
@@ -1561,7 +3469,7 @@ async def createbusiness(ctx, business_type: str, business_name: str, investment
         f"**Daily Profit:** {format_money(daily_profit)}\n"
         f"**Profit Rate:** {type_info['profit']*100}%\n"
         f"**Level:** 1\n\n"
-        f"Your business will generate profits every 24 hours!\n"
+        f"Your business earns profit continuously - collect it any time!\n"
         f"Use `!mybusiness` to check your business status.",
         discord.Color.green()
     )
@@ -1570,9 +3478,9 @@ async def createbusiness(ctx, business_type: str, business_name: str, investment
 @bot.command(name="mybusiness", aliases=["business", "mybiz"])
 async def mybusiness(ctx):
     """Check your business status"""
-    user_id = str(ctx.author.id)
+    account = await bot.economy.get(ctx.author.id)
 
-    if user_id not in bot.businesses:
+    if not account.business:
         embed = create_embed(
             "🏢 No Business",
             "You don't own a business yet!\n"
@@ -1589,17 +3497,17 @@ async def mybusiness(ctx):
         await ctx.send(embed=embed)
         return
 
-    business = bot.businesses[user_id]
+    business = account.business
+    now = time.time()
+    if settle_business(business, now):
+        update_economy(account, "settle_business", businesses=business)
 
     last_profit_text = "Never"
     if business["last_profit"]:
-        last_time = datetime.datetime.fromisoformat(business["last_profit"])
-        time_since = datetime.datetime.now() - last_time
-        hours_since = int(time_since.total_seconds() // 3600)
+        hours_since = int((now - iso_to_epoch(business["last_profit"])) // 3600)
         last_profit_text = f"{hours_since} hours ago"
 
     daily_profit = int(business["investment"] * business["profit_rate"])
-    next_profit_in = 24 - (datetime.datetime.now().hour % 24)
 
     embed = create_embed(
         f"{business['emoji']} {business['name']}",
@@ -1608,8 +3516,8 @@ async def mybusiness(ctx):
         f"**Investment:** {format_money(business['investment'])}\n"
         f"**Daily Profit:** {format_money(daily_profit)}\n"
         f"**Total Profits:** {format_money(business['total_profit'])}\n"
-        f"**Last Profit:** {last_profit_text}\n"
-        f"**Next Profit In:** ~{next_profit_in} hours\n\n"
+        f"**Ready to Collect:** {format_money(business['pending_profit'])}\n"
+        f"**Last Collected:** {last_profit_text}\n\n"
         f"**Commands:**\n"
         f"• `!upgradebusiness` - Upgrade your business\n"
         f"• `!collectprofit` - Collect your profits\n"
@@ -1621,47 +3529,42 @@ async def mybusiness(ctx):
 @bot.command(name="collectprofit")
 async def collectprofit(ctx):
     """Collect your business profits"""
-    user_id = str(ctx.author.id)
+    account = await bot.economy.get(ctx.author.id)
 
-    if user_id not in bot.businesses:
+    if not account.business:
         embed = create_embed("❌ No Business", "You don't own a business!", discord.Color.red())
         await ctx.send(embed=embed)
         return
 
-    business = bot.businesses[user_id]
-
-    if business["last_profit"]:
-        last_time = datetime.datetime.fromisoformat(business["last_profit"])
-        time_since = datetime.datetime.now() - last_time
-
-        if time_since.total_seconds() < 86400:
-            hours_left = 23 - int(time_since.seconds // 3600)
-            minutes_left = 59 - int((time_since.seconds % 3600) // 60)
+    business = account.business
+    now = time.time()
+    settle_business(business, now)
+    profit = business["pending_profit"]
 
-            embed = create_embed(
-                "⏳ Profit Not Ready",
-                f"Your business needs more time to generate profits!\n"
-                f"Come back in **{hours_left}h {minutes_left}m**",
-                discord.Color.orange()
-            )
-            await ctx.send(embed=embed)
-            return
+    if profit <= 0:
+        daily_profit = int(business["investment"] * business["profit_rate"])
+        embed = create_embed(
+            "⏳ Profit Not Ready",
+            f"Your business hasn't earned anything since your last collection!\n"
+            f"It earns **{format_money(daily_profit)}** per day.",
+            discord.Color.orange()
+        )
+        await ctx.send(embed=embed)
+        return
 
-    daily_profit = int(business["investment"] * business["profit_rate"])
-    business["total_profit"] += daily_profit
-    business["last_profit"] = datetime.datetime.now().isoformat()
+    business["pending_profit"] = 0
+    business["total_profit"] += profit
+    business["last_profit"] = epoch_to_iso(now)
 
-    bot.wallets[user_id] = bot.wallets.get(user_id, 0) + daily_profit
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "collect_profit", wallet=profit, businesses=business)
 
     embed = create_embed(
         f"💰 Profit Collected! {business['emoji']}",
         f"**Business:** {business['name']}\n"
-        f"**Profit Collected:** {format_money(daily_profit)}\n"
+        f"**Profit Collected:** {format_money(profit)}\n"
         f"**Total Profits:** {format_money(business['total_profit'])}\n"
-        f"**New Balance:** {format_money(bot.wallets[user_id])}\n\n"
-        f"Your business will generate more profits in 24 hours!",
+        f"**New Balance:** {format_money(account.wallet)}\n\n"
+        f"Your business keeps earning - collect again any time!",
         discord.Color.green()
     )
     await ctx.send(embed=embed)
@@ -1669,14 +3572,14 @@ async def collectprofit(ctx):
 @bot.command(name="upgradebusiness")
 async def upgradebusiness(ctx):
     """Upgrade your business to increase profits"""
-    user_id = str(ctx.author.id)
+    account = await bot.economy.get(ctx.author.id)
 
-    if user_id not in bot.businesses:
+    if not account.business:
         embed = create_embed("❌ No Business", "You don't own a business!", discord.Color.red())
         await ctx.send(embed=embed)
         return
 
-    business = bot.businesses[user_id]
+    business = account.business
     current_level = business["level"]
 
     if current_level >= 10:
@@ -1685,7 +3588,7 @@ async def upgradebusiness(ctx):
         return
 
     upgrade_cost = business["investment"] * 0.5
-    wallet = bot.wallets.get(user_id, 0)
+    wallet = account.wallet
 
     if wallet < upgrade_cost:
         embed = create_embed(
@@ -1696,13 +3599,13 @@ async def upgradebusiness(ctx):
         await ctx.send(embed=embed)
         return
 
+    # Lock in profit earned at the old rate before it changes
+    settle_business(business, time.time())
     business["level"] += 1
     business["investment"] += int(upgrade_cost)
     business["profit_rate"] += 0.02
 
-    bot.wallets[user_id] = wallet - int(upgrade_cost)
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "upgrade_business", wallet=-int(upgrade_cost), businesses=business)
 
     new_daily_profit = int(business["investment"] * business["profit_rate"])
 
@@ -1721,27 +3624,27 @@ async def upgradebusiness(ctx):
 @bot.command(name="closebusiness")
 async def closebusiness(ctx):
     """Close your business and get back your investment"""
-    user_id = str(ctx.author.id)
+    account = await bot.economy.get(ctx.author.id)
 
-    if user_id not in bot.businesses:
+    if not account.business:
         embed = create_embed("❌ No Business", "You don't own a business!", discord.Color.red())
         await ctx.send(embed=embed)
         return
 
-    business = bot.businesses[user_id]
+    business = account.business
+    settle_business(business, time.time())
     refund = business["investment"] // 2
+    profit = business["pending_profit"]
 
-    bot.wallets[user_id] = bot.wallets.get(user_id, 0) + refund
-    del bot.businesses[user_id]
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "close_business", wallet=refund + profit, businesses=None)
 
     embed = create_embed(
         f"🏢 Business Closed",
         f"**Business:** {business['name']}\n"
         f"**Refund Received:** {format_money(refund)}\n"
-        f"**Total Profits Made:** {format_money(business['total_profit'])}\n"
-        f"**New Balance:** {format_money(bot.wallets[user_id])}\n\n"
+        f"**Uncollected Profit Paid Out:** {format_money(profit)}\n"
+        f"**Total Profits Made:** {format_money(business['total_profit'] + profit)}\n"
+        f"**New Balance:** {format_money(account.wallet)}\n\n"
         f"You can start a new business anytime with `!createbusiness`",
         discord.Color.orange()
     )
@@ -1751,6 +3654,7 @@ async def closebusiness(ctx):
 @bot.command(name="shop")
 async def shop(ctx, category: str = None):
     """Browse the shop"""
+    account = await bot.economy.get(ctx.author.id)
     if not category:
         categories_text = ""
         for cat in bot.shop_items:
@@ -1763,7 +3667,7 @@ async def shop(ctx, category: str = None):
             f"**Available Categories:**\n{categories_text}\n"
             f"**How to buy:** `!buy <category> <item_name>`\n"
             f"**Example:** `!buy roles VIP`\n\n"
-            f"**Your Balance:** {format_money(bot.wallets.get(str(ctx.author.id), 0))}",
+            f"**Your Balance:** {format_money(account.wallet)}",
             discord.Color.blue()
         )
         await ctx.send(embed=embed)
@@ -1785,7 +3689,7 @@ async def shop(ctx, category: str = None):
     embed = create_embed(
         f"🛒 {category.title()} Shop",
         f"Use `!buy {category} <item_name>` to purchase\n"
-        f"**Your Balance:** {format_money(bot.wallets.get(str(ctx.author.id), 0))}",
+        f"**Your Balance:** {format_money(account.wallet)}",
         discord.Color.blue()
     )
 
@@ -1844,8 +3748,8 @@ async def buy(ctx, category: str = None, *, item_name: str = None):
         await ctx.send(embed=embed)
         return
 
-    user_id = str(ctx.author.id)
-    wallet = bot.wallets.get(user_id, 0)
+    account = await bot.economy.get(ctx.author.id)
+    wallet = account.wallet
 
     if wallet < item["price"]:
         embed = create_embed(
@@ -1897,18 +3801,7 @@ async def buy(ctx, category: str = None, *, item_name: str = None):
             await ctx.send(embed=embed)
             return
 
-    bot.wallets[user_id] = wallet - item["price"]
-
-    if user_id not in bot.owned_items:
-        bot.owned_items[user_id] = {}
-
-    if category not in bot.owned_items[user_id]:
-        bot.owned_items[user_id][category] = []
-
-    bot.owned_items[user_id][category].append(item["name"])
-
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(account, "buy", wallet=-item["price"], add_item=(category, item["name"]))
 
     embed = create_embed(
         "✅ Purchase Successful!",
@@ -1925,7 +3818,7 @@ async def buy(ctx, category: str = None, *, item_name: str = None):
 
     embed.add_field(
         name="💰 New Balance",
-        value=f"**{format_money(bot.wallets[user_id])}**",
+        value=f"**{format_money(account.wallet)}**",
         inline=False
     )
 
@@ -1935,9 +3828,9 @@ async def buy(ctx, category: str = None, *, item_name: str = None):
 async def inventory(ctx, member: discord.Member = None):
     """Check your inventory or another user's inventory"""
     target = member or ctx.author
-    user_id = str(target.id)
+    owned_items = (await bot.economy.get(target.id)).owned_items
 
-    if user_id not in bot.owned_items or not bot.owned_items[user_id]:
+    if not owned_items:
         embed = create_embed(
             f"📦 {target.name}'s Inventory",
             f"{target.name} doesn't own any items yet!\n"
@@ -1947,7 +3840,7 @@ async def inventory(ctx, member: discord.Member = None):
         await ctx.send(embed=embed)
         return
 
-    total_items = sum(len(items) for items in bot.owned_items[user_id].values())
+    total_items = sum(len(items) for items in owned_items.values())
 
     embed = create_embed(
         f"📦 {target.name}'s Inventory",
@@ -1955,7 +3848,7 @@ async def inventory(ctx, member: discord.Member = None):
         discord.Color.blue()
     )
 
-    for category, items in bot.owned_items[user_id].items():
+    for category, items in owned_items.items():
         if items:
             items_text = "\n".join([f"• {item}" for item in items[:10]])
             if len(items) > 10:
@@ -1975,20 +3868,18 @@ async def inventory(ctx, member: discord.Member = None):
 @bot.command(name="rich", aliases=["leaderboard", "top", "lb"])
 async def rich(ctx):
     """Show richest users"""
-    users = []
-    for user_id, wallet in bot.wallets.items():
-        bank = bot.banks.get(user_id, 0)
-        total = wallet + bank
-        if total > 0:
-            try:
-                user = await bot.fetch_user(int(user_id))
-                users.append((user.name, total, user_id))
-            except:
-                continue
-
-    users.sort(key=lambda x: x[1], reverse=True)
+    wealth = bot.economy.wealth
+    if wealth is None:
+        # Supabase ranks wealth; write pending balance changes first so they count
+        await economy_writer.flush_now()
+        top = await db.load_richest(10)
+        mine = await db.load_wealth_rank(ctx.author.id)
+    else:
+        top = wealth.top(10)
+        rank = wealth.rank(ctx.author.id)
+        mine = (rank, wealth.totals[ctx.author.id]) if rank else None
 
-    if not users:
+    if not top:
         embed = create_embed(
             "🏆 Richest Users",
             "No one has any money yet! Use `!daily` or `!work` to get started.",
@@ -2003,20 +3894,19 @@ async def rich(ctx):
         discord.Color.gold()
     )
 
-    for i, (name, money, user_id) in enumerate(users[:10], 1):
+    names = await bot.names.resolve_many((user_id for user_id, _ in top), ctx.guild)
+
+    for i, (user_id, money) in enumerate(top, 1):
         medal = ""
         if i == 1: medal = "🥇"
         elif i == 2: medal = "🥈"
         elif i == 3: medal = "🥉"
 
-        try:
-            member = ctx.guild.get_member(int(user_id))
-            if member:
-                display_name = f"{member.mention}"
-            else:
-                display_name = name
-        except:
-            display_name = name
+        member = ctx.guild.get_member(user_id) if ctx.guild else None
+        if member:
+            display_name = f"{member.mention}"
+        else:
+            display_name = names[user_id] or f"User {user_id}"
 
         embed.add_field(
             name=f"{medal} {i}. {display_name}",
@@ -2024,20 +3914,10 @@ async def rich(ctx):
             inline=False
         )
 
-    current_user_id = str(ctx.author.id)
-    current_wallet = bot.wallets.get(current_user_id, 0)
-    current_bank = bot.banks.get(current_user_id, 0)
-    current_total = current_wallet + current_bank
-
-    rank = None
-    for i, (_, money, uid) in enumerate(users, 1):
-        if uid == current_user_id:
-            rank = i
-            break
-
-    if rank:
+    if mine:
+        rank, total = mine
         embed.set_footer(
-            text=f"Your rank: #{rank} with {format_money(current_total)}"
+            text=f"Your rank: #{rank} with {format_money(total)}"
         )
     else:
         embed.set_footer(
@@ -2053,16 +3933,16 @@ async def startcountrygame(ctx, game_type: str, continent: str, rounds: int = -1
     """
     Start a country guessing game (flag or capital)
     Usage: !startcountrygame <flag/capital> <continent> [rounds]
+    - continent: one continent, "All", or a list like "Europe,Asia" / "Europe:2,Asia" (weighted)
     - rounds: number of rounds to play (default = infinite, -1)
     """
-    guild_id = str(ctx.guild.id)
-
-    if guild_id in bot.active_games and bot.active_games[guild_id].get("active", False):
-        await ctx.send("❌ A game is already running! Use `!stopcountrygame` first.")
+    if ctx.channel.id in bot.active_games:
+        await ctx.send("❌ A game is already running in this channel! Use `!stopcountrygame` first.")
         return
 
-    if continent not in bot.countries:
-        await ctx.send(f"❌ Continent not available. Choose from: {', '.join(bot.countries.keys())}")
+    pool = bot.country_catalog.parse_pool(continent)
+    if pool is None:
+        await ctx.send(f"❌ Continent not available. Choose from: All, {', '.join(bot.country_catalog.continents)}")
         return
 
     if game_type not in ["flag", "capital"]:
@@ -2076,18 +3956,11 @@ async def startcountrygame(ctx, game_type: str, continent: str, rounds: int = -1
         await ctx.send("❌ Invalid round count. Use -1 for infinite or a positive number.")
         return
 
-    bot.active_games[guild_id] = {
-        "active": True,
-        "game_type": game_type,
-        "continent": continent,
-        "rounds": rounds,
-        "round_count": 0,
-        "winners": [],
-        "paused": False,
-        "channel_id": ctx.channel.id
-    }
+    game = CountryGame(ctx.guild, ctx.channel.id, game_type, pool, rounds)
+    bot.active_games[ctx.channel.id] = game
+    refresh_guild_interest(ctx.guild.id)
 
-    await next_country_round(ctx.guild)
+    await game.start()
 
     round_info = f"**Rounds:** {'Infinite' if rounds == -1 else rounds}"
     embed = create_embed(
@@ -2104,48 +3977,41 @@ async def startcountrygame(ctx, game_type: str, continent: str, rounds: int = -1
 @bot.command(name="pausegame")
 @commands.has_permissions(manage_messages=True)
 async def pausegame(ctx):
-    """Pause the current country game"""
-    guild_id = str(ctx.guild.id)
-
-    if guild_id not in bot.active_games or not bot.active_games[guild_id].get("active", False):
-        await ctx.send("❌ No active game to pause!")
+    """Pause the country game in this channel"""
+    game = bot.active_games.get(ctx.channel.id)
+    if game is None:
+        await ctx.send("❌ No active game in this channel to pause!")
         return
 
-    bot.active_games[guild_id]["paused"] = True
+    await game.pause()
     await ctx.send("⏸️ Game paused! Use `!resumegame` to continue.")
 
 @bot.command(name="resumegame")
 @commands.has_permissions(manage_messages=True)
 async def resumegame(ctx):
-    """Resume paused country game"""
-    guild_id = str(ctx.guild.id)
-
-    if guild_id not in bot.active_games:
-        await ctx.send("❌ No game to resume!")
+    """Resume the paused country game in this channel"""
+    game = bot.active_games.get(ctx.channel.id)
+    if game is None:
+        await ctx.send("❌ No game in this channel to resume!")
         return
 
-    if not bot.active_games[guild_id].get("paused", False):
+    if not game.paused:
         await ctx.send("❌ Game is not paused!")
         return
 
-    bot.active_games[guild_id]["paused"] = False
     await ctx.send("▶️ Game resumed!")
-    await next_country_round(ctx.guild)
+    await game.resume()
 
 @bot.command(name="stopcountrygame")
 @commands.has_permissions(manage_messages=True)
 async def stopcountrygame(ctx):
-    """Stop the country game"""
-    guild_id = str(ctx.guild.id)
-
-    if guild_id not in bot.active_games or not bot.active_games[guild_id].get("active", False):
-        await ctx.send("❌ No active game to stop!")
+    """Stop the country game in this channel"""
+    game = bot.active_games.get(ctx.channel.id)
+    if game is None:
+        await ctx.send("❌ No active game in this channel to stop!")
         return
 
-    if "timer" in bot.active_games[guild_id]:
-        bot.active_games[guild_id]["timer"].cancel()
-
-    del bot.active_games[guild_id]
+    await game.stop()
 
     embed = create_embed(
         "🛑 Game Stopped",
@@ -2155,26 +4021,27 @@ async def stopcountrygame(ctx):
     await ctx.send(embed=embed)
 
 @bot.command(name="countryleaderboard", aliases=["countrylb", "countryscores"])
-async def countryleaderboard(ctx):
-    """Show country game leaderboard"""
-    if not bot.country_scores:
+async def countryleaderboard(ctx, scope: str = "season"):
+    """Show this server's season leaderboard (`!countryleaderboard global` for all-time)"""
+    if ctx.guild is None or scope.lower() in ("global", "all", "alltime"):
+        board = bot.country_board
+        title, subtitle = "🏆 Country Game Leaderboard", "All-time top players in flag/capital guessing"
+    else:
+        board = bot.season_boards.get(ctx.guild.id)
+        title = f"🏆 Country Game Leaderboard — Season {board.season if board else 1}"
+        subtitle = f"Top players in {ctx.guild.name} this season"
+
+    top_scores = board.leaders() if board else []
+    if not top_scores:
         await ctx.send("📊 No country game scores yet! Start a game with `!startcountrygame`")
         return
 
-    sorted_scores = sorted(bot.country_scores.items(), key=lambda x: x[1], reverse=True)
+    names = await bot.names.resolve_many((user_id for user_id, _ in top_scores), ctx.guild)
 
-    embed = create_embed(
-        "🏆 Country Game Leaderboard",
-        "Top players in flag/capital guessing",
-        discord.Color.gold()
-    )
+    embed = create_embed(title, subtitle, discord.Color.gold())
 
-    for i, (user_id, score) in enumerate(sorted_scores[:10], 1):
-        try:
-            user = await bot.fetch_user(int(user_id))
-            name = user.name
-        except:
-            name = f"User {user_id}"
+    for i, (user_id, score) in enumerate(top_scores, 1):
+        name = names[int(user_id)] or f"User {user_id}"
 
         medal = ""
         if i == 1: medal = "🥇"
@@ -2187,7 +4054,27 @@ async def countryleaderboard(ctx):
             inline=False
         )
 
-    await ctx.send(embed=embed) 
+    await ctx.send(embed=embed)
+
+@bot.command(name="newseason")
+@commands.has_permissions(administrator=True)
+async def newseason(ctx):
+    """Close this server's country game season and start a new one"""
+    old = start_new_season(ctx.guild.id)
+    winners = old.leaders()[:3]
+    names = await bot.names.resolve_many((user_id for user_id, _ in winners), ctx.guild)
+
+    podium = "\n".join(
+        f"{medal} {names[int(user_id)] or f'User {user_id}'} — **{score} points**"
+        for medal, (user_id, score) in zip(("🥇", "🥈", "🥉"), winners)
+    ) or "Nobody scored this season."
+    embed = create_embed(
+        f"🗓️ Season {old.season} Closed",
+        f"{podium}\n\n**Season {old.season + 1}** starts now — good luck!",
+        discord.Color.gold()
+    )
+    await ctx.send(embed=embed)
+
 # ===== QUARANTINE SYSTEM =====
 
 @bot.command(name="q")  # Changed from "quarantine" to "q"
@@ -2289,9 +4176,10 @@ async def quarantine(ctx, member: discord.Member, *, reason="No reason provided"
         bot.quarantine_channels[guild_id] = {}
 
     bot.quarantine_channels[guild_id][str(quarantine_channel.id)] = user_id
+    refresh_guild_interest(guild_id)
 
     save_quarantine()
-    asyncio.create_task(async_save_quarantine())
+    quarantine_writer.request()
 
     embed = create_embed(
         "🦠 User Quarantined",
@@ -2344,9 +4232,10 @@ async def unquarantine(ctx, member: discord.Member):
 
     if not bot.quarantined_users[guild_id]:
         del bot.quarantined_users[guild_id]
+    refresh_guild_interest(guild_id)
 
     save_quarantine()
-    asyncio.create_task(async_save_quarantine())
+    quarantine_writer.request()
 
     embed = create_embed(
         "✅ User Released",
@@ -2378,16 +4267,20 @@ async def quarantinelist(ctx):
         discord.Color.orange()
     )
 
-    for user_id, info in bot.quarantined_users[guild_id].items():
+    quarantined = bot.quarantined_users[guild_id]
+    user_ids = set(quarantined)
+    user_ids.update(info["quarantined_by"] for info in quarantined.values() if info.get("quarantined_by"))
+    names = await bot.names.resolve_many(user_ids, ctx.guild)
+
+    for user_id, info in quarantined.items():
         try:
-            user = await bot.fetch_user(int(user_id))
-            quarantined_by = await bot.fetch_user(int(info["quarantined_by"])) if info.get("quarantined_by") else "Unknown"
+            quarantined_by = names[int(info["quarantined_by"])] if info.get("quarantined_by") else None
             quarantined_at = datetime.datetime.fromisoformat(info["quarantined_at"]).strftime("%Y-%m-%d %H:%M")
 
             embed.add_field(
-                name=f"👤 {user.name}",
+                name=f"👤 {names[int(user_id)] or f'User {user_id}'}",
                 value=f"**Reason:** {info['reason']}\n"
-                      f"**By:** {quarantined_by.name}\n"
+                      f"**By:** {quarantined_by or 'Unknown'}\n"
                       f"**Since:** {quarantined_at}",
                 inline=False
             )
@@ -2406,15 +4299,13 @@ async def givemoney(ctx, member: discord.Member, amount: int):
         await ctx.send(embed=embed)
         return
 
-    user_id = str(member.id)
-    bot.wallets[user_id] = bot.wallets.get(user_id, 0) + amount
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    account = await bot.economy.get(member.id)
+    update_economy(account, "givemoney", wallet=amount)
 
     embed = create_embed(
         "✅ Money Given",
         f"Gave **{format_money(amount)}** to {member.mention}\n"
-        f"**Their New Balance:** {format_money(bot.wallets[user_id])}",
+        f"**Their New Balance:** {format_money(account.wallet)}",
         discord.Color.green()
     )
     embed.set_footer(text=f"Given by {ctx.author.name}")
@@ -2429,10 +4320,8 @@ async def setbalance(ctx, member: discord.Member, amount: int):
         await ctx.send(embed=embed)
         return
 
-    user_id = str(member.id)
-    bot.wallets[user_id] = amount
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    account = await bot.economy.get(member.id)
+    update_economy(account, "setbalance", wallet=amount - account.wallet)
 
     embed = create_embed(
         "✅ Balance Set",
@@ -2451,15 +4340,13 @@ async def addmoney(ctx, amount: int):
         await ctx.send(embed=embed)
         return
 
-    user_id = str(ctx.author.id)
-    bot.wallets[user_id] = bot.wallets.get(user_id, 0) + amount
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    account = await bot.economy.get(ctx.author.id)
+    update_economy(account, "addmoney", wallet=amount)
 
     embed = create_embed(
         "✅ Money Added",
         f"Added **{format_money(amount)}** to your wallet!\n"
-        f"**New Balance:** {format_money(bot.wallets[user_id])}",
+        f"**New Balance:** {format_money(account.wallet)}",
         discord.Color.green()
     )
     await ctx.send(embed=embed)
@@ -2492,7 +4379,7 @@ async def addshopitem(ctx, category: str, name: str, price: int, *, description:
 
         bot.shop_items[category].append(new_item)
 
-        asyncio.create_task(async_save_shop_items())
+        shop_writer.request()
         with open(SHOP_FILE, "w") as f:
             json.dump(bot.shop_items, f, indent=2)
 
@@ -2531,7 +4418,7 @@ async def editshopitem(ctx, category: str, item_name: str, new_price: int, *, ne
             await ctx.send(f"❌ Item **{item_name}** not found in {category} category!")
             return
 
-        asyncio.create_task(async_save_shop_items())
+        shop_writer.request()
         with open(SHOP_FILE, "w") as f:
             json.dump(bot.shop_items, f, indent=2)
 
@@ -2559,7 +4446,8 @@ async def setsalary(ctx, role_name: str, amount: int):
             await ctx.send("❌ Salary cannot be negative!")
             return
 
-        role = discord.utils.get(ctx.guild.roles, name=role_name)
+        role_id = role_id_from_key(role_name)
+        role = ctx.guild.get_role(role_id) if role_id else discord.utils.get(ctx.guild.roles, name=role_name)
         if not role:
             for r in ctx.guild.roles:
                 if r.name.lower() == role_name.lower():
@@ -2571,11 +4459,9 @@ async def setsalary(ctx, role_name: str, amount: int):
             return
 
         exact_role_name = role.name
-        bot.role_salaries[exact_role_name] = amount
-
-        asyncio.create_task(async_save_role_salaries())
-        with open(ROLE_SALARIES_FILE, "w") as f:
-            json.dump(bot.role_salaries, f, indent=2)
+        bot.role_salaries[role.id] = amount
+        rebuild_salary_index()
+        save_role_salaries()
 
         embed = create_embed(
             "✅ Salary Set",
@@ -2595,7 +4481,7 @@ async def setsalary(ctx, role_name: str, amount: int):
 async def salarylist(ctx):
     """View all role salaries"""
     try:
-        if not bot.role_salaries:
+        if not bot.role_salaries and not bot.unmatched_salaries:
             await ctx.send("No role salaries set yet!")
             return
 
@@ -2605,7 +4491,7 @@ async def salarylist(ctx):
             color=discord.Color.gold()
         )
 
-        default_salary = bot.role_salaries.get("default", 1000)
+        default_salary = bot.default_salary
         embed.add_field(
             name="👤 Default (no special role)",
             value=format_money(default_salary),
@@ -2613,9 +4499,10 @@ async def salarylist(ctx):
         )
 
         other_salaries = []
-        for role, salary in bot.role_salaries.items():
-            if role != "default":
-                other_salaries.append((role, salary))
+        for role_id, salary in bot.role_salaries.items():
+            role = ctx.guild.get_role(role_id)
+            if role:
+                other_salaries.append((role.name, salary))
 
         if other_salaries:
             other_salaries.sort(key=lambda x: x[1], reverse=True)
@@ -2670,45 +4557,17 @@ async def paysalary(ctx):
     """Manually pay daily salaries to all users (Admin only)"""
     await ctx.send("💰 Processing manual salary payment...")
 
-    salaries_given = 0
-    total_amount = 0
-    salary_details = {}
-
-    for guild in bot.guilds:
-        for member in guild.members:
-            if not member.bot:
-                user_id = str(member.id)
-                salary = bot.role_salaries.get("default", 1000)
-                highest_role_name = "Default"
-
-                for role in member.roles:
-                    if role.name in bot.role_salaries:
-                        role_salary = bot.role_salaries[role.name]
-                        if role_salary > salary:
-                            salary = role_salary
-                            highest_role_name = role.name
-
-                bot.banks[user_id] = bot.banks.get(user_id, 0) + salary
-                salaries_given += 1
-                total_amount += salary
-
-                if highest_role_name not in salary_details:
-                    salary_details[highest_role_name] = {"count": 0, "total": 0}
-                salary_details[highest_role_name]["count"] += 1
-                salary_details[highest_role_name]["total"] += salary
-
+    salaries_given, total_amount, salary_details = await run_payroll()
+    if not salaries_given:
+        embed = create_embed(
+            "💰 Salaries Already Paid",
+            f"Everyone has already received their salary for {bot.payroll_date}.",
+            discord.Color.orange()
+        )
+        await ctx.send(embed=embed)
+        return
     save_economy()
-    asyncio.create_task(async_save_economy())
-
-    with open(LAST_SALARY_FILE, "w") as f:
-        json.dump({
-            "last_salary": datetime.datetime.now().isoformat(),
-            "salaries_given": salaries_given,
-            "total_amount": total_amount,
-            "date": datetime.datetime.now().strftime("%Y-%m-%d"),
-            "paid_by": str(ctx.author.id),
-            "manual_payment": True
-        }, f, indent=2)
+    bot.scheduler.postpone("daily_salaries")
 
     embed = create_embed(
         "💰 Manual Salary Payment Complete",
@@ -2734,6 +4593,28 @@ async def paysalary(ctx):
 
     await ctx.send(embed=embed)
     print(f"✅ Manual salary payment by {ctx.author.name}: ${format_money(total_amount)} to {salaries_given} users")
+
+@bot.command(name="jobs")
+@commands.has_permissions(administrator=True)
+async def jobs(ctx):
+    """Show scheduled jobs and when they run next (Admin only)"""
+    embed = create_embed("⏰ Scheduled Jobs", "Periodic jobs and their next run", discord.Color.blue())
+
+    for name, (_, interval) in sorted(bot.scheduler.jobs.items(), key=lambda job: bot.scheduler.state[job[0]]["next_run"]):
+        state = bot.scheduler.state[name]
+        status = "🟢 Running now" if name in bot.scheduler.running else f"Next run <t:{int(state['next_run'])}:R>"
+        last_run = f"<t:{int(state['last_run'])}:R>" if state["last_run"] else "Never"
+        embed.add_field(
+            name=f"📌 {name}",
+            value=f"**Status:** {status}\n"
+                  f"**Every:** {interval // 3600}h\n"
+                  f"**Last Run:** {last_run}\n"
+                  f"**Last Result:** {state['last_result'] or 'N/A'}",
+            inline=False
+        )
+
+    await ctx.send(embed=embed)
+
 # ===== NEW: COURT & JUDGE SYSTEM =====
 
 @bot.command(name="sue")
@@ -2778,26 +4659,22 @@ async def guilty(ctx, member: discord.Member, amount: int):
         return await ctx.send(f"⚖️ There is no active lawsuit against {member.display_name}.")
 
     plaintiff = found_case["plaintiff"]
-    target_id = str(member.id)
-    plaintiff_id = str(plaintiff.id)
+    defendant = await bot.economy.get(member.id)
+    plaintiff_account = await bot.economy.get(plaintiff.id)
 
-    def_wallet = bot.wallets.get(target_id, 0)
-    def_bank = bot.banks.get(target_id, 0)
+    def_wallet = defendant.wallet
+    def_bank = defendant.bank
 
     if (def_wallet + def_bank) < amount:
         return await ctx.send("⚖️ The defendant doesn't have enough money to pay that settlement!")
 
     if def_wallet >= amount:
-        bot.wallets[target_id] -= amount
+        update_economy(defendant, "lawsuit_fine", wallet=-amount)
     else:
         remaining = amount - def_wallet
-        bot.wallets[target_id] = 0
-        bot.banks[target_id] -= remaining
+        update_economy(defendant, "lawsuit_fine", wallet=-def_wallet, bank=-remaining)
 
-    bot.wallets[plaintiff_id] = bot.wallets.get(plaintiff_id, 0) + amount
-
-    save_economy()
-    asyncio.create_task(async_save_economy())
+    update_economy(plaintiff_account, "lawsuit_settlement", wallet=amount)
 
     del bot.active_lawsuits[case_key]
 
@@ -2823,143 +4700,35 @@ async def dismiss(ctx, member: discord.Member):
     await ctx.send("⚖️ No active lawsuit found for that member.")
 # ===== BACKGROUND TASKS =====
 
-@tasks.loop(minutes=60)
 async def daily_salaries():
-    """Give daily salaries, checking if 24 hours have passed"""
-    try:
-        with open(LAST_SALARY_FILE, "r") as f:
-            last_salary_data = json.load(f)
-        last_salary_time = datetime.datetime.fromisoformat(last_salary_data.get("last_salary", "2000-01-01T00:00:00"))
-    except:
-        last_salary_time = datetime.datetime.now() - datetime.timedelta(days=1)
-
-    time_since_last = datetime.datetime.now() - last_salary_time
-
-    if time_since_last.total_seconds() >= 86400:
-        print("💰 24 hours passed, processing daily salaries...")
-
-        salaries_given = 0
-        total_amount = 0
-
-        for guild in bot.guilds:
-            for member in guild.members:
-                if not member.bot:
-                    user_id = str(member.id)
-                    salary = bot.role_salaries.get("default", 1000)
-
-                    for role in member.roles:
-                        if role.name in bot.role_salaries:
-                            role_salary = bot.role_salaries[role.name]
-                            if role_salary > salary:
-                                salary = role_salary
-
-                    bot.banks[user_id] = bot.banks.get(user_id, 0) + salary
-                    salaries_given += 1
-                    total_amount += salary
-
-        save_economy()
-        asyncio.create_task(async_save_economy())
-
-        with open(LAST_SALARY_FILE, "w") as f:
-            json.dump({
-                "last_salary": datetime.datetime.now().isoformat(),
-                "salaries_given": salaries_given,
-                "total_amount": total_amount,
-                "date": datetime.datetime.now().strftime("%Y-%m-%d")
-            }, f, indent=2)
+    """Pay everyone's daily salary (scheduled job)"""
+    print("💰 Processing daily salaries...")
+    salaries_given, total_amount, _ = await run_payroll()
+    save_economy()
+    print(f"✅ Daily salaries processed! ${format_money(total_amount)} given to {salaries_given} users")
+    return f"Paid {format_money(total_amount)} to {salaries_given} users"
 
-        print(f"✅ Daily salaries processed! ${format_money(total_amount)} given to {salaries_given} users")
-    else:
-        hours_left = 23 - int(time_since_last.seconds // 3600)
-        minutes_left = 59 - int((time_since_last.seconds % 3600) // 60)
-        if minutes_left % 30 == 0:
-            print(f"⏳ Next salary in {hours_left}h {minutes_left}m")
-
-@tasks.loop(hours=12)
-async def business_profits():
-    """Generate business profits every 24 hours (persistent timer)"""
+def last_run_from_file(data, key):
+    """Epoch time of the last run recorded by the old timer files, if any"""
     try:
-        with open(LAST_BUSINESS_PROFIT_FILE, "r") as f:
-            last_profit_data = json.load(f)
-        last_profit_time = datetime.datetime.fromisoformat(last_profit_data.get("last_business_profit", "2000-01-01T00:00:00"))
+        return iso_to_epoch(data[key])
     except:
-        last_profit_time = datetime.datetime.now() - datetime.timedelta(days=1)
-
-    time_since_last = datetime.datetime.now() - last_profit_time
-
-    if time_since_last.total_seconds() >= 86400:
-        print("🏢 24 hours passed, generating business profits...")
-
-        profits_generated = 0
-        total_profits = 0
-
-        for user_id, business in bot.businesses.items():
-            daily_profit = int(business["investment"] * business["profit_rate"])
-            business["total_profit"] += daily_profit
-            business["last_profit"] = datetime.datetime.now().isoformat()
-            profits_generated += 1
-            total_profits += daily_profit
-
-        if profits_generated > 0:
-            save_economy()
-            asyncio.create_task(async_save_economy())
-            print(f"✅ Business profits generated! ${format_money(total_profits)} for {profits_generated} businesses")
-
-        with open(LAST_BUSINESS_PROFIT_FILE, "w") as f:
-            json.dump({
-                "last_business_profit": datetime.datetime.now().isoformat(),
-                "businesses_count": profits_generated,
-                "total_profits": total_profits,
-                "date": datetime.datetime.now().strftime("%Y-%m-%d")
-            }, f, indent=2)
-    else:
-        hours_left = 23 - int(time_since_last.seconds // 3600)
-        minutes_left = 59 - int((time_since_last.seconds % 3600) // 60)
-        if minutes_left % 60 == 0:
-            print(f"⏳ Next business profits in {hours_left}h {minutes_left}m")
-
-@tasks.loop(minutes=1)
-async def check_muted_users():
-    """Check for muted users to unmute"""
-    now = datetime.datetime.now()
-    unmuted_count = 0
-
-    for user_id, data in list(bot.muted_users.items()):
-        try:
-            unmute_at = datetime.datetime.fromisoformat(data["unmute_at"])
+        return None
 
-            if now >= unmute_at:
-                try:
-                    guild = bot.get_guild(data["guild_id"])
-                    if guild:
-                        member = guild.get_member(int(user_id))
-                        if member:
-                            mute_role = discord.utils.get(guild.roles, name="Muted")
-                            if mute_role and mute_role in member.roles:
-                                await member.remove_roles(mute_role)
-                                unmuted_count += 1
-                except:
-                    pass
+# Jobs run one day after their last recorded run (old timer files) or right away
+for job_name, job_func, last_run in (
+    ("daily_salaries", daily_salaries, last_run_from_file(last_salary_data, "last_salary")),
+):
+    bot.scheduler.add(job_name, job_func, 86400, first_run=last_run + 86400 if last_run else None)
+bot.scheduler.restore(load_jobs())
 
-                del bot.muted_users[user_id]
-        except:
-            del bot.muted_users[user_id]
-
-    if unmuted_count > 0:
-        save_data()
-        print(f"🔇 Automatically unmuted {unmuted_count} users")
 # ===== ERROR HANDLING =====
 
 @bot.event
 async def on_command_error(ctx, error):
     """Handle command errors"""
     if isinstance(error, commands.CommandNotFound):
-        embed = create_embed(
-            "❌ Command Not Found",
-            f"Command not found! Use `!help` to see all commands.",
-            discord.Color.red()
-        )
-        await ctx.send(embed=embed, delete_after=10)
+        await send_unknown_command(ctx.channel)
 
     elif isinstance(error, commands.MissingPermissions):
         embed = create_embed(
@@ -2990,6 +4759,9 @@ async def on_command_error(ctx, error):
     else:
         print(f"⚠️ Unexpected error in command {ctx.command}: {type(error).__name__}: {error}")
 
+# Every command and alias is registered by now
+bot.command_map = build_command_map()
+
 # ===== MAIN FUNCTION =====
 
 def main():